@@ -3,15 +3,15 @@ Travel Planner - Flask Backend API
 Production-ready deployment configuration
 """
 
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, Response, g, request, jsonify, render_template
+from flask.json.provider import DefaultJSONProvider
+from flask_compress import Compress
 from flask_cors import CORS
-from planner import (
-    planner_agent,
-    budget_agent,
-    normalize_itinerary_costs,
-    normalize_budget_estimate,
-    apply_meal_pois,
-)
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from werkzeug.middleware.proxy_fix import ProxyFix
+from whitenoise import WhiteNoise
+import orjson
 from travel_data import (
     autocomplete_destination, 
     get_weather, 
@@ -23,15 +23,34 @@ from travel_data import (
     get_hotels,
 )
 from transport_pricing import build_transport_pricing
+from cache_store import ExpiringCache
 import os
+import re
 import traceback
+import atexit
+import hashlib
+import importlib
 import logging
+import math
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 import time
 import copy
+import threading
 from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from typing import Annotated, Any, Dict, List, Optional
 from dotenv import load_dotenv
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints, ValidationError, field_validator
+
+try:
+    from gevent.monkey import is_module_patched as monkey_patched
+except ImportError:  # gevent is only needed for the production entrypoint
+    def monkey_patched(module_name: str) -> bool:
+        return False
 
 # Load environment variables for local development
 _env_name = os.getenv('FLASK_ENV')
@@ -52,83 +71,342 @@ class Config:
     TESTING = os.getenv('FLASK_ENV') == 'testing'
     ENV = os.getenv('FLASK_ENV', 'production')
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
-    CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:3000,http://localhost:5000').split(',')
+    CORS_ORIGINS = frozenset(
+        origin.strip()
+        for origin in os.getenv('CORS_ORIGINS', 'http://localhost:3000,http://localhost:5000').split(',')
+        if origin.strip()
+    )
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max request size
+    SEND_FILE_MAX_AGE_DEFAULT = int(os.getenv('STATIC_MAX_AGE', '604800'))  # static assets are cache-busted by query string
+    # Response compression (flask-compress); brotli level 4 costs about as much CPU as gzip
+    COMPRESS_MIMETYPES = ['application/json', 'text/html']
+    COMPRESS_ALGORITHM = ['br', 'gzip']
+    COMPRESS_BR_LEVEL = 4
+    COMPRESS_LEVEL = 6
+    # Per-client request quotas (flask-limiter); shared across workers via Redis when configured
+    RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'true').lower() != 'false'
+    RATELIMIT_STORAGE_URI = os.getenv('REDIS_URL') or 'memory://'
+    RATELIMIT_DEFAULT = os.getenv('RATELIMIT_DEFAULT', '100/minute')
+    RATELIMIT_HEADERS_ENABLED = True
+    ITINERARY_RATE_LIMIT = os.getenv('ITINERARY_RATE_LIMIT', '10/minute')
+    AUTOCOMPLETE_RATE_LIMIT = os.getenv('AUTOCOMPLETE_RATE_LIMIT', '60/minute')
+    # Opt-in: import the planner (and its model SDK) in the background at boot
+    # so the first itinerary request doesn't pay for it; off keeps boot lazy
+    PREWARM_PLANNER = os.getenv('PREWARM_PLANNER', 'false').lower() == 'true'
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson so jsonify() and request.json run in native code"""
+
+    sort_keys = False  # clients don't depend on key order; sorting costs a pass per dict
+
+    def _options(self, sort_keys: bool, indent) -> int:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        option = self._options(kwargs.get('sort_keys', self.sort_keys), kwargs.get('indent'))
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def response(self, *args, **kwargs):
+        # jsonify() path: hand orjson's bytes straight to the response instead of
+        # decoding to str for Flask to re-encode.
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        option = self._options(self.sort_keys, pretty) | orjson.OPT_APPEND_NEWLINE
+        body = orjson.dumps(obj, default=self.default, option=option)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
 
 
 # Initialize Flask app
 app = Flask(__name__, template_folder='templates', static_folder='static')
 app.config.from_object(Config)
+app.json = OrjsonProvider(app)
+Compress(app)
+limiter = Limiter(get_remote_address, app=app)
+# Behind a load balancer (e.g. Render), trust its X-Forwarded-For so rate limits
+# and logs see the real client address rather than the proxy's.
+_trusted_proxies = int(os.getenv('TRUSTED_PROXY_COUNT', '0'))
+if _trusted_proxies:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=_trusted_proxies, x_proto=_trusted_proxies)
+# Static files are answered by WhiteNoise before Flask's routing/hooks run; a
+# fronting nginx/CDN can take over /static/ entirely (see nginx.conf).
+app.wsgi_app = WhiteNoise(
+    app.wsgi_app,
+    root=str(_base_dir / 'static'),
+    prefix='static/',
+    max_age=Config.SEND_FILE_MAX_AGE_DEFAULT,
+)
 
 # CORS configuration
 CORS(app, origins=Config.CORS_ORIGINS, allow_headers=['Content-Type'])
 
 # Logging configuration
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('travel_planner.log'),
-        logging.StreamHandler()
-    ]
-)
+# Request threads only enqueue records; a background listener thread owns the
+# file/console handlers so disk writes never block a request.
+class _JsonLogFormatter(logging.Formatter):
+    """One JSON object per line so log shippers can index fields without parsing"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        http = getattr(record, 'http', None)
+        if http:
+            entry.update(http)
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+if os.getenv('LOG_FORMAT', 'json').lower() == 'json':
+    _log_formatter: logging.Formatter = _JsonLogFormatter()
+else:
+    _log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [logging.FileHandler('travel_planner.log'), logging.StreamHandler()]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+_log_queue: queue.Queue = queue.Queue(-1)
+_log_listener = QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)  # flush queued records on shutdown
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
 logger = logging.getLogger(__name__)
 
-_exchange_rate_cache = {}
-_travel_keywords = ('depart', 'departure', 'flight', 'train', 'transfer', 'journey', 'travel', 'transit')
 CACHE_TTL_SECONDS = 3600
-_poi_cache = {}
-_hotel_cache = {}
+GEO_LOCK_WAIT_SECONDS = 5
+GEO_FETCH_TIMEOUT_SECONDS = float(os.getenv('GEO_FETCH_TIMEOUT', '3'))
+GEOAPIFY_CONFIGURED = bool(os.getenv('GEOAPIFY_API_KEY'))
+GEO_CACHE_TTL_SECONDS = int(os.getenv('GEO_CACHE_TTL', '86400'))  # venues change slowly
+GEO_BUCKET_DECIMALS = 2  # ~1.1 km of latitude
+ITINERARY_CACHE_TTL_SECONDS = int(os.getenv('ITINERARY_CACHE_TTL', '86400'))
+_exchange_rate_cache = ExpiringCache('fx', CACHE_TTL_SECONDS)
+# Currencies whose USD rate is fetched in the background at startup so the
+# first quote conversion does not pay the round-trip (INR covers rail fares).
+EXCHANGE_RATE_PREWARM = tuple(
+    code.strip().upper()
+    for code in os.getenv('EXCHANGE_RATE_PREWARM', 'INR').split(',')
+    if code.strip() and code.strip().upper() != 'USD'
+)
+_travel_keywords = ('depart', 'departure', 'flight', 'train', 'transfer', 'journey', 'travel', 'transit')
+_travel_keyword_re = re.compile('|'.join(map(re.escape, _travel_keywords)), re.IGNORECASE)
+_REQUIRED_FIELDS = frozenset({'source', 'destination', 'days', 'budget', 'style', 'interests', 'group'})
+# Fixed validation failures for /api/generate-itinerary, serialized once at import.
+_VALIDATION_ERRORS = {
+    key: orjson.dumps({'success': False, 'error': message})
+    for key, message in {
+        'not_json': 'Content-Type must be application/json',
+        'invalid_travelers': 'Invalid traveler count',
+        'empty_source': 'Source cannot be empty',
+        'empty_destination': 'Destination cannot be empty',
+        'days_range': 'Days must be between 1 and 30',
+        'budget_range': 'Budget must be between 500 and 100000',
+        'no_interests': 'At least one interest must be selected',
+        'too_few_travelers': 'Travelers must be at least 1',
+        'group_travelers': 'Please provide the number of travelers for non-solo trips',
+    }.items()
+}
+_poi_cache = ExpiringCache('poi', GEO_CACHE_TTL_SECONDS)
+_autocomplete_cache = ExpiringCache('autocomplete', CACHE_TTL_SECONDS, max_entries=10000)
+_itinerary_cache = ExpiringCache('itinerary', ITINERARY_CACHE_TTL_SECONDS, max_entries=512)
+_hotel_cache = ExpiringCache('hotels', GEO_CACHE_TTL_SECONDS)
 _cost_history: defaultdict[str, deque] = defaultdict(lambda: deque(maxlen=120))
+_cost_history_sum: defaultdict[str, float] = defaultdict(float)
+_cost_history_lock = threading.Lock()
+_inflight_lock = threading.Lock()
+_inflight_fetches: dict[str, Future] = {}
+
+# Shared pool for the blocking upstream calls (LLM, Geoapify, fares) made by a
+# single itinerary request; they are independent, so they run side by side.
+# Under gevent the pool's threads are greenlets, so size it for the worker's
+# connection count rather than for OS threads.
+_default_io_workers = '256' if monkey_patched('threading') else '16'
+_io_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('ITINERARY_IO_WORKERS', _default_io_workers)),
+    thread_name_prefix='itinerary-io',
+)
+# Static asset version for the index page; stable per deploy (or per process when
+# no commit id is available) so browsers keep cached CSS/JS between page loads.
+ASSET_VERSION = os.getenv('BUILD_SHA') or os.getenv('RENDER_GIT_COMMIT') or str(int(time.time()))
+INDEX_MAX_AGE_SECONDS = 60
+
+# Max-age (seconds) for GET endpoints whose data changes rarely; exchange rates
+# move during the day so they get a short window. /api/status is left out: it
+# reports the current time, so its body (and ETag) differs on every call.
+REFERENCE_MAX_AGE_SECONDS = 86400
+CACHEABLE_ENDPOINTS = {
+    'get_styles': REFERENCE_MAX_AGE_SECONDS,
+    'get_interests': REFERENCE_MAX_AGE_SECONDS,
+    'get_groups': REFERENCE_MAX_AGE_SECONDS,
+    'api_travel_advisory': 3600,
+    'api_country_info': 3600,
+    'api_exchange_rate': 300,
+}
+_index_bytes: Optional[bytes] = None
+
+
+@lru_cache(maxsize=2048)
+def _geo_cache_key(lat: float, lon: float, radius: int, limit: int, kinds: str) -> str:
+    # Bucket the centre to ~1 km so the same city from different geocoders (or
+    # spellings) shares one entry, while same-named cities elsewhere don't collide.
+    lat_bucket = round(lat, GEO_BUCKET_DECIMALS) + 0.0  # + 0.0 folds -0.0 into 0.0
+    lon_bucket = round(lon, GEO_BUCKET_DECIMALS) + 0.0
+    return f"{lat_bucket:.{GEO_BUCKET_DECIMALS}f},{lon_bucket:.{GEO_BUCKET_DECIMALS}f}|{radius}|{limit}|{kinds}"
+
+
+def _fetch_geo_result(cache: ExpiringCache, key: str, fetcher, fallback=None):
+    has_lock = cache.acquire_lock(key)
+    if not has_lock:
+        # Another worker is already filling this key; give it a moment first.
+        deadline = time.time() + GEO_LOCK_WAIT_SECONDS
+        while time.time() < deadline:
+            time.sleep(0.1)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+    try:
+        try:
+            data = fetcher() or fallback or []
+        except Exception as exc:
+            logger.warning('Geo cache fetch failed for %s: %s', key, exc)
+            data = fallback or []
+        cache.set(key, data)
+        return data
+    finally:
+        if has_lock:
+            cache.release_lock(key)
+
+
+def _cached_geo_result(cache: ExpiringCache, key: str, fetcher, fallback=None):
+    # Cached geo payloads are shared, not copied: callers only read POI/hotel
+    # dicts and build their own lists/entries from them.
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
 
-
-def _build_cache_key(name: str, date: str, tag: str) -> str:
-    normalized_name = (name or 'unknown').strip().lower() or 'unknown'
-    normalized_date = date or 'any'
-    return f"{normalized_name}|{normalized_date}|{tag}"
-
-
-def _get_cached_entry(cache: dict, key: str):
-    payload = cache.get(key)
-    if not payload:
-        return None
-    if time.time() - payload['ts'] > CACHE_TTL_SECONDS:
-        cache.pop(key, None)
-        return None
-    return copy.deepcopy(payload['data'])
+    # Single-flight: concurrent misses for the same key wait on the first
+    # caller's fetch instead of each hitting Geoapify.
+    with _inflight_lock:
+        pending = _inflight_fetches.get(key)
+        is_owner = pending is None
+        if is_owner:
+            pending = Future()
+            _inflight_fetches[key] = pending
+    if not is_owner:
+        return pending.result()
+
+    data = fallback or []
+    try:
+        cached = cache.get(key)
+        data = cached if cached is not None else _fetch_geo_result(cache, key, fetcher, fallback)
+    finally:
+        with _inflight_lock:
+            _inflight_fetches.pop(key, None)
+        pending.set_result(data)
+    return data
 
 
-def _set_cache_entry(cache: dict, key: str, data):
-    cache[key] = {
-        'data': copy.deepcopy(data),
-        'ts': time.time()
-    }
+def _validation_error(key: str) -> Response:
+    # New Response each time: after_request hooks (CORS) add headers to it.
+    return Response(_VALIDATION_ERRORS[key], status=400, mimetype='application/json')
+
+
+_StrippedStr = Annotated[str, StringConstraints(strip_whitespace=True)]
+_RequiredStr = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+
+
+class ItineraryRequest(BaseModel):
+    """Body of POST /api/generate-itinerary (presence of required keys is checked first)"""
+
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    source: _RequiredStr
+    destination: _RequiredStr
+    days: Annotated[int, Field(ge=1, le=30)] = 5
+    budget: Annotated[float, Field(ge=500, le=100000)] = 3000
+    style: _StrippedStr = 'Mid-Range'
+    interests: Annotated[List[Any], Field(min_length=1)]
+    group: _StrippedStr = 'Solo'
+    special_needs: _StrippedStr = ''
+    travelers: Annotated[int, Field(ge=1)] = 1
+    start_date: Optional[Any] = None
+    source_details: Dict[str, Any] = {}
+    destination_details: Dict[str, Any] = {}
+
+    @field_validator('travelers', 'source_details', 'destination_details', mode='before')
+    @classmethod
+    def _falsy_to_default(cls, value, info):
+        # Clients send 0/null/'' for "not provided"
+        if value:
+            return value
+        return 1 if info.field_name == 'travelers' else {}
+
+
+# First failing field -> canned message; days/budget/travelers only map when the
+# value parsed but fell outside its range.
+_FIELD_ERRORS = {
+    'source': 'empty_source',
+    'destination': 'empty_destination',
+    'days': 'days_range',
+    'budget': 'budget_range',
+    'interests': 'no_interests',
+    'travelers': 'too_few_travelers',
+}
+_RANGE_ERROR_TYPES = frozenset({'greater_than_equal', 'less_than_equal'})
+
+
+def _itinerary_validation_error(exc: ValidationError) -> Response:
+    error = exc.errors(include_url=False)[0]
+    field = error['loc'][0] if error['loc'] else None
+    key = _FIELD_ERRORS.get(field)
+    if field in ('days', 'budget', 'travelers') and error['type'] not in _RANGE_ERROR_TYPES:
+        key = 'invalid_travelers' if field == 'travelers' else None
+    if key:
+        return _validation_error(key)
+    return jsonify({
+        'success': False,
+        'error': 'Invalid input values',
+        'message': f"{field}: {error['msg']}" if field else error['msg']
+    }), 400
 
 
-def _cached_geo_result(cache: dict, key: str, fetcher, fallback=None):
-    cached = _get_cached_entry(cache, key)
-    if cached is not None:
-        return cached
-    try:
-        data = fetcher() or fallback or []
-    except Exception as exc:
-        logger.warning('Geo cache fetch failed for %s: %s', key, exc)
-        data = fallback or []
-    _set_cache_entry(cache, key, data)
-    return data
+def _itinerary_cache_key(**params) -> str:
+    """Content-address a generation request so identical trips share one response."""
+    return hashlib.sha256(orjson.dumps(params, option=orjson.OPT_SORT_KEYS)).hexdigest()
 
 
 def _history_average(category: str) -> float:
     values = _cost_history.get(category)
     if not values:
         return 0.0
-    return sum(values) / len(values)
+    return _cost_history_sum[category] / len(values)
 
 
 def _record_history(category: str, value: int) -> None:
     if value <= 0:
         return
-    _cost_history[category].append(value)
+    # Keep a running sum next to each window so averages stay O(1); the lock
+    # keeps the sum consistent with the deque across request threads.
+    with _cost_history_lock:
+        values = _cost_history[category]
+        if len(values) == values.maxlen:
+            _cost_history_sum[category] -= values[0]
+        values.append(value)
+        _cost_history_sum[category] += value
 
 
 def _smooth_cost_outliers(itinerary):
@@ -138,32 +416,41 @@ def _smooth_cost_outliers(itinerary):
     if not isinstance(schedule, list):
         return itinerary
 
-    updated_days = []
+    # The itinerary is already this request's private copy, so activities are
+    # clamped in place. Flatten them first so the clamp bounds are computed
+    # once per category from the history snapshot.
+    pending = []
     for day in schedule:
         if not isinstance(day, dict):
-            updated_days.append(day)
             continue
-        day_copy = copy.deepcopy(day)
-        for activity in day_copy.get('activities', []):
+        for activity in day.get('activities') or []:
             if not isinstance(activity, dict):
                 continue
             category = (activity.get('category') or 'general').lower()
             cost = _safe_int(activity.get('estimated_cost') or activity.get('cost'))
-            avg = _history_average(category)
-            if avg and cost:
-                lower = avg * 0.4
-                upper = avg * 2.2
-                if cost < lower:
-                    cost = int(lower)
-                elif cost > upper:
-                    cost = int(upper)
             if cost:
-                activity['estimated_cost'] = cost
-                activity['cost'] = cost
-                _record_history(category, cost)
-        updated_days.append(day_copy)
+                pending.append((activity, category, cost))
+    if not pending:
+        return itinerary
+
+    bounds = {}
+    for category in {category for _, category, _ in pending}:
+        avg = _history_average(category)
+        bounds[category] = (avg * 0.4, avg * 2.2) if avg else None
+
+    for activity, category, cost in pending:
+        limits = bounds[category]
+        if limits:
+            lower, upper = limits
+            if cost < lower:
+                cost = int(lower)
+            elif cost > upper:
+                cost = int(upper)
+        if cost:
+            activity['estimated_cost'] = cost
+            activity['cost'] = cost
+            _record_history(category, cost)
 
-    itinerary['itinerary'] = updated_days
     return itinerary
 
 
@@ -210,20 +497,60 @@ def _inject_hotel_recommendations(itinerary, hotels, destination_name):
     return itinerary
 
 
+def _json_clone(value):
+    """Deep-copy a JSON-shaped payload via an orjson round trip (much faster than deepcopy)."""
+    try:
+        return orjson.loads(orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS))
+    except TypeError:
+        return copy.deepcopy(value)
+
+
 def _safe_int(value):
+    # Most values were already coerced by the normalizers; skip float()/round() for them.
+    value_type = type(value)
+    if value_type is int:
+        return value
+    if value_type is float:
+        return int(round(value)) if math.isfinite(value) else 0
     try:
         return int(round(float(value)))
-    except (TypeError, ValueError):
+    except (TypeError, ValueError, OverflowError):
         return 0
 
 
 def _safe_float(value):
+    value_type = type(value)
+    if value_type is float:
+        return value
+    if value_type is int:
+        return float(value)
     try:
         return float(value)
     except (TypeError, ValueError):
         return 0.0
 
 
+def _usd_rate(currency_code: str) -> float:
+    rate = _exchange_rate_cache.get(currency_code)
+    if rate is not None:
+        return rate
+    try:
+        payload = get_exchange_rate(currency_code, 'USD')
+        rate = _safe_float(payload.get('rate')) if payload else 0.0
+    except Exception as exc:
+        logger.warning('Exchange lookup failed for %s: %s', currency_code, exc)
+        rate = 0.0
+    if rate <= 0:
+        return 1.0
+    _exchange_rate_cache.set(currency_code, rate)
+    return rate
+
+
+def _prewarm_exchange_rates():
+    for currency_code in EXCHANGE_RATE_PREWARM:
+        _usd_rate(currency_code)
+
+
 def _convert_to_usd(amount, currency):
     amount = _safe_float(amount)
     if amount <= 0:
@@ -231,17 +558,7 @@ def _convert_to_usd(amount, currency):
     currency_code = (currency or 'USD').upper()
     if currency_code == 'USD':
         return amount
-
-    rate = _exchange_rate_cache.get(currency_code)
-    if rate is None:
-        try:
-            payload = get_exchange_rate(currency_code, 'USD')
-            rate = _safe_float(payload.get('rate')) if payload else 1.0
-        except Exception as exc:
-            logger.warning('Exchange lookup failed for %s: %s', currency_code, exc)
-            rate = 1.0
-        _exchange_rate_cache[currency_code] = rate or 1.0
-    return amount * (rate or 1.0)
+    return amount * _usd_rate(currency_code)
 
 
 def _quote_total_cost(quote, fallback_travelers):
@@ -254,18 +571,27 @@ def _quote_total_cost(quote, fallback_travelers):
     return per_person * max(1, travelers)
 
 
+def _mentions_travel(text) -> bool:
+    return isinstance(text, str) and _travel_keyword_re.search(text) is not None
+
+
+def _is_travel_day(day: dict) -> bool:
+    if _mentions_travel(day.get('theme')) or _mentions_travel(day.get('summary')):
+        return True
+    for bucket in ('activities', 'meals'):
+        for entry in day.get(bucket, []) or []:
+            if not isinstance(entry, dict):
+                continue
+            if _mentions_travel(entry.get('activity') or entry.get('restaurant')):
+                return True
+            if _mentions_travel(entry.get('description')):
+                return True
+    return False
+
+
 def _find_travel_day(schedule):
     for day in schedule:
-        if not isinstance(day, dict):
-            continue
-        text_bits = [day.get('theme', ''), day.get('summary', '')]
-        for bucket in ('activities', 'meals'):
-            for entry in day.get(bucket, []) or []:
-                if isinstance(entry, dict):
-                    text_bits.append(entry.get('activity') or entry.get('restaurant') or '')
-                    text_bits.append(entry.get('description') or '')
-        blob = ' '.join(text_bits).lower()
-        if any(keyword in blob for keyword in _travel_keywords):
+        if isinstance(day, dict) and _is_travel_day(day):
             return day
     return schedule[0] if schedule else None
 
@@ -355,6 +681,12 @@ def _inject_transport_costs(itinerary, budget, transport_options):
     return itinerary, budget, transport_summary
 
 
+if not Config.TESTING:
+    _io_executor.submit(_prewarm_exchange_rates)
+if Config.PREWARM_PLANNER and not Config.TESTING:
+    _io_executor.submit(importlib.import_module, 'planner')
+
+
 # Error Handlers
 @app.errorhandler(400)
 def bad_request(error):
@@ -376,6 +708,16 @@ def not_found(error):
     }), 404
 
 
+@app.errorhandler(429)
+def rate_limited(error):
+    """Handle requests over a rate limit"""
+    return jsonify({
+        'success': False,
+        'error': 'Too many requests',
+        'message': f'Rate limit exceeded ({error.description}). Please try again shortly.'
+    }), 429
+
+
 @app.errorhandler(500)
 def internal_error(error):
     """Handle internal server errors"""
@@ -389,91 +731,159 @@ def internal_error(error):
 
 # Middleware for request logging
 @app.before_request
-def log_request():
-    """Log incoming requests"""
-    logger.info(f'{request.method} {request.path} from {request.remote_addr}')
+def start_request_timer():
+    """Stamp the request start for the access log line"""
+    g.request_start = time.perf_counter()
 
 
 @app.after_request
 def log_response(response):
-    """Log outgoing responses"""
-    logger.info(f'Response: {response.status_code}')
+    """Log one access line per request with its status and duration"""
+    start = g.get('request_start')  # unset if an earlier hook (e.g. the rate limiter) aborted
+    duration_ms = (time.perf_counter() - start) * 1000 if start is not None else -1.0
+    logger.info(
+        '%s %s %d %.1fms %s',
+        request.method, request.path, response.status_code, duration_ms, request.remote_addr,
+        extra={'http': {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 1),
+            'remote': request.remote_addr,
+        }},
+    )
     return response
 
 
+@app.after_request
+def apply_cache_headers(response):
+    """Let browsers/proxies reuse slow-changing GET responses and revalidate via ETag"""
+    max_age = CACHEABLE_ENDPOINTS.get(request.endpoint)
+    if max_age is None or request.method != 'GET' or response.status_code != 200:
+        return response
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    # Weak: flask-compress re-encodes the body after this hook, so the tag
+    # vouches for the content, not the exact (gzip/br) bytes on the wire
+    response.add_etag(weak=True)
+    # JSON bodies are only revalidated (If-None-Match -> 304), never split into ranges
+    return response.make_conditional(request, accept_ranges=False)
+
+
 @app.route('/')
 def index():
     """Serve the main page"""
+    global _index_bytes
     try:
-        # Cache-buster timestamp to force fresh static asset loads
-        return render_template('index.html', cache_buster=int(time.time()))
+        # The page only varies by asset version, so render it once per process
+        if _index_bytes is None:
+            _index_bytes = render_template('index.html', cache_buster=ASSET_VERSION).encode('utf-8')
+        response = Response(_index_bytes, mimetype='text/html')
+        response.cache_control.public = True
+        response.cache_control.max_age = INDEX_MAX_AGE_SECONDS
+        return response
     except Exception as e:
         logger.error(f'Error serving index: {str(e)}')
         return jsonify({'error': 'Failed to load application'}), 500
 
 
-@app.route('/static/<path:path>')
-def send_static(path):
-    """Serve static files"""
-    try:
-        return send_from_directory('static', path)
-    except Exception as e:
-        logger.error(f'Error serving static file: {str(e)}')
-        return jsonify({'error': 'File not found'}), 404
-
 @app.route('/api/generate-itinerary', methods=['POST'])
+@limiter.limit(Config.ITINERARY_RATE_LIMIT)
 def generate_itinerary():
     """Generate a comprehensive travel itinerary"""
+    # planner pulls in the Gemini SDK; it is imported on first use so workers
+    # boot (and answer health checks) without it.
+    from planner import (
+        planner_agent,
+        budget_agent,
+        normalize_itinerary_costs,
+        normalize_budget_estimate,
+        apply_meal_pois,
+    )
+
     try:
         # Validate request
         if not request.is_json:
-            return jsonify({
-                'success': False,
-                'error': 'Content-Type must be application/json'
-            }), 400
+            return _validation_error('not_json')
 
         data = request.json
         
         # Validate required fields
-        required_fields = ['source', 'destination', 'days', 'budget', 'style', 'interests', 'group']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    'success': False,
-                    'error': f'Missing required field: {field}'
-                }), 400
+        missing = _REQUIRED_FIELDS.difference(data) if isinstance(data, dict) else _REQUIRED_FIELDS
+        if missing:
+            return jsonify({
+                'success': False,
+                'error': f"Missing required field: {', '.join(sorted(missing))}"
+            }), 400
 
         # Parse and validate input
-        source = str(data.get('source', '')).strip()
-        destination = str(data.get('destination', '')).strip()
-        days = int(data.get('days', 5))
-        budget = float(data.get('budget', 3000))
-        style = str(data.get('style', 'Mid-Range')).strip()
-        interests = data.get('interests', [])
-        group = str(data.get('group', 'Solo')).strip()
-        special_needs = str(data.get('special_needs', '')).strip()
         try:
-            travelers = int(data.get('travelers') or 1)
-        except (TypeError, ValueError):
-            return jsonify({'success': False, 'error': 'Invalid traveler count'}), 400
-        start_date = data.get('start_date')
-        source_details = data.get('source_details') or {}
-        destination_details = data.get('destination_details') or {}
+            payload = ItineraryRequest.model_validate(data)
+        except ValidationError as exc:
+            return _itinerary_validation_error(exc)
+
+        source = payload.source
+        destination = payload.destination
+        days = payload.days
+        budget = payload.budget
+        style = payload.style
+        interests = payload.interests
+        group = payload.group
+        special_needs = payload.special_needs
+        travelers = payload.travelers
+        start_date = payload.start_date
+        source_details = payload.source_details
+        destination_details = payload.destination_details
 
         source_details.setdefault('name', source)
         destination_details.setdefault('name', destination)
 
-        meal_pois = []
-        hotel_recs = []
+        if group.lower() != 'solo' and travelers < 2:
+            return _validation_error('group_travelers')
+
+        cache_key = _itinerary_cache_key(
+            source=source.lower(),
+            destination=destination.lower(),
+            days=days,
+            budget=budget,
+            style=style.lower(),
+            interests=sorted(str(item).strip().lower() for item in interests),
+            group=group.lower(),
+            special_needs=special_needs,
+            travelers=travelers,
+            start_date=start_date,
+            source_coords=[source_details.get('lat'), source_details.get('lon')],
+            destination_coords=[destination_details.get('lat'), destination_details.get('lon')],
+        )
+        cached_response = _itinerary_cache.get(cache_key)
+        if cached_response is not None:
+            logger.info('Serving cached itinerary for %s -> %s', source, destination)
+            return jsonify({**cached_response, 'timestamp': datetime.utcnow().isoformat()}), 200
+
+        logger.info(
+            'Generating itinerary: %s -> %s (%s days, $%s, %s travelers)',
+            source,
+            destination,
+            days,
+            budget,
+            travelers,
+        )
+
         try:
             dest_lat = float(destination_details.get('lat'))
             dest_lon = float(destination_details.get('lon'))
         except (TypeError, ValueError):
             dest_lat = dest_lon = None
 
-        if dest_lat is not None and dest_lon is not None:
-            cache_tag = _build_cache_key(destination, start_date or '', 'meals')
-            meal_pois = _cached_geo_result(
+        # Fan out the independent upstream calls; the request then waits for
+        # the slowest one instead of the sum of all of them.
+        meal_future = hotel_future = None
+        if dest_lat is not None and dest_lon is not None and GEOAPIFY_CONFIGURED:
+            # Nearby places depend only on where, not when: concurrent trips to
+            # the same area share one Geoapify fetch.
+            cache_tag = _geo_cache_key(dest_lat, dest_lon, 1500, 20, 'foods,cafes,restaurants')
+            meal_future = _io_executor.submit(
+                _cached_geo_result,
                 _poi_cache,
                 cache_tag,
                 lambda: get_pois(
@@ -482,12 +892,14 @@ def generate_itinerary():
                     kinds='foods,cafes,restaurants',
                     radius=1500,
                     limit=20,
+                    timeout=GEO_FETCH_TIMEOUT_SECONDS,
                 ),
                 fallback=[]
             )
 
-            hotel_tag = _build_cache_key(destination, start_date or '', 'hotels')
-            hotel_recs = _cached_geo_result(
+            hotel_tag = _geo_cache_key(dest_lat, dest_lon, 2500, 6, 'hotels')
+            hotel_future = _io_executor.submit(
+                _cached_geo_result,
                 _hotel_cache,
                 hotel_tag,
                 lambda: get_hotels(
@@ -495,40 +907,32 @@ def generate_itinerary():
                     lon=dest_lon,
                     radius=2500,
                     limit=6,
+                    timeout=GEO_FETCH_TIMEOUT_SECONDS,
                 ),
                 fallback=[]
             )
 
-        # Validate input constraints
-        if not source:
-            return jsonify({'success': False, 'error': 'Source cannot be empty'}), 400
-        if not destination:
-            return jsonify({'success': False, 'error': 'Destination cannot be empty'}), 400
-        if days < 1 or days > 30:
-            return jsonify({'success': False, 'error': 'Days must be between 1 and 30'}), 400
-        if budget < 500 or budget > 100000:
-            return jsonify({'success': False, 'error': 'Budget must be between 500 and 100000'}), 400
-        if not isinstance(interests, list) or len(interests) == 0:
-            return jsonify({'success': False, 'error': 'At least one interest must be selected'}), 400
-        if travelers < 1:
-            return jsonify({'success': False, 'error': 'Travelers must be at least 1'}), 400
-        if group.lower() != 'solo' and travelers < 2:
-            return jsonify({'success': False, 'error': 'Please provide the number of travelers for non-solo trips'}), 400
+        budget_future = _io_executor.submit(budget_agent, destination, days, budget, style, source, travelers)
+        transport_future = _io_executor.submit(
+            build_transport_pricing,
+            source_details=source_details,
+            destination_details=destination_details,
+            departure_date=start_date,
+            travelers=travelers,
+        )
 
-        logger.info(
-            'Generating itinerary: %s -> %s (%s days, $%s, %s travelers)',
-            source,
-            destination,
-            days,
-            budget,
-            travelers,
+        # The planner is the slowest call, so run it on the request thread while
+        # the pool handles the rest; this keeps one pool slot free per request.
+        itinerary_raw = planner_agent(
+            destination, days, budget, style, interests, group, special_needs, source, travelers
         )
+        meal_pois = meal_future.result() if meal_future else []
+        hotel_recs = hotel_future.result() if hotel_future else []
 
         # Generate itinerary
-        itinerary_raw = planner_agent(destination, days, budget, style, interests, group, special_needs, source, travelers)
         if not itinerary_raw:
             raise ValueError('Planner failed to return itinerary data')
-        itinerary = normalize_itinerary_costs(copy.deepcopy(itinerary_raw), budget, days)
+        itinerary = normalize_itinerary_costs(_json_clone(itinerary_raw), budget, days)
         if meal_pois:
             itinerary = apply_meal_pois(itinerary, meal_pois, itinerary_raw)
             itinerary = normalize_itinerary_costs(itinerary, budget, days)
@@ -536,17 +940,12 @@ def generate_itinerary():
             itinerary = _inject_hotel_recommendations(itinerary, hotel_recs, destination)
         
         # Generate budget breakdown
-        budget_raw = budget_agent(destination, days, budget, style, source, travelers)
+        budget_raw = budget_future.result()
         if not budget_raw:
             raise ValueError('Budget agent failed to return data')
-        budget_info = normalize_budget_estimate(copy.deepcopy(budget_raw), budget, days)
+        budget_info = normalize_budget_estimate(_json_clone(budget_raw), budget, days)
 
-        transport_options = build_transport_pricing(
-            source_details=source_details,
-            destination_details=destination_details,
-            departure_date=start_date,
-            travelers=travelers,
-        )
+        transport_options = transport_future.result()
 
         itinerary, budget_info, transport_summary = _inject_transport_costs(
             itinerary,
@@ -559,13 +958,11 @@ def generate_itinerary():
 
         logger.info(f'Successfully generated itinerary for {destination}')
 
-        return jsonify({
+        response_payload = {
             'success': True,
             'itinerary': itinerary,
-            'itinerary_normalized': itinerary,
             'itinerary_raw': itinerary_raw,
             'budget': budget_info,
-            'budget_normalized': budget_info,
             'budget_raw': budget_raw,
             'transport': transport_options,
             'hotels': hotel_recs,
@@ -574,8 +971,10 @@ def generate_itinerary():
                 'travelers': travelers,
                 'start_date': start_date
             },
-            'timestamp': datetime.utcnow().isoformat()
-        }), 200
+        }
+        # Cached without the timestamp: it is stamped per response, hit or miss
+        _itinerary_cache.set(cache_key, response_payload)
+        return jsonify({**response_payload, 'timestamp': datetime.utcnow().isoformat()}), 200
 
     except ValueError as e:
         logger.error(f'Value error in generate_itinerary: {str(e)}')
@@ -593,21 +992,30 @@ def generate_itinerary():
         }), 500
 
 
+# Process-lifetime facts reported by /api/health and /api/status
+_ENV_VARS_SET = {
+    'GOOGLE_API_KEY': bool(os.getenv('GOOGLE_API_KEY')),
+    'TAVILY_API_KEY': bool(os.getenv('TAVILY_API_KEY')),
+    'GEOAPIFY_API_KEY': GEOAPIFY_CONFIGURED,
+}
+_STATUS_INFO = {
+    'app': 'Travel Planner API',
+    'version': '1.0.0',
+    'environment': Config.ENV,
+    'debug': Config.DEBUG,
+}
+
+
 @app.route('/api/health', methods=['GET'])
+@limiter.exempt
 def health():
     """Health check endpoint for deployment monitoring"""
     try:
-        env_vars = {
-            'GOOGLE_API_KEY': bool(os.getenv('GOOGLE_API_KEY')),
-            'TAVILY_API_KEY': bool(os.getenv('TAVILY_API_KEY')),
-            'GEOAPIFY_API_KEY': bool(os.getenv('GEOAPIFY_API_KEY'))
-        }
-        
         return jsonify({
             'status': 'healthy',
             'environment': Config.ENV,
             'timestamp': datetime.utcnow().isoformat(),
-            'env_vars_set': env_vars
+            'env_vars_set': _ENV_VARS_SET
         }), 200
     except Exception as e:
         logger.error(f'Health check failed: {str(e)}')
@@ -620,49 +1028,63 @@ def health():
 @app.route('/api/status', methods=['GET'])
 def status():
     """Get application status and configuration"""
-    return jsonify({
-        'app': 'Travel Planner API',
-        'version': '1.0.0',
-        'environment': Config.ENV,
-        'debug': Config.DEBUG,
-        'timestamp': datetime.utcnow().isoformat()
-    }), 200
+    return jsonify({**_STATUS_INFO, 'timestamp': datetime.utcnow().isoformat()}), 200
+
+
+TRAVEL_STYLES = ["Budget", "Mid-Range", "Luxury", "Adventure", "Cultural", "Relaxation"]
+TRAVEL_INTERESTS = [
+    "History & Culture", "Food & Dining", "Adventure Sports", "Nature",
+    "Nightlife", "Shopping", "Beach", "Mountains", "Art & Museums", "Photography"
+]
+GROUP_TYPES = ["Solo", "Couple", "Family", "Friends Group", "Corporate"]
+
+# Reference lists never change at runtime: serialize them once at import.
+_STYLES_JSON = orjson.dumps(TRAVEL_STYLES)
+_INTERESTS_JSON = orjson.dumps(TRAVEL_INTERESTS)
+_GROUPS_JSON = orjson.dumps(GROUP_TYPES)
+
+
+def _reference_response(body: bytes) -> Response:
+    # A fresh Response per request: after_request hooks (CORS) mutate headers.
+    return Response(body, mimetype='application/json')
 
 
 @app.route('/api/styles', methods=['GET'])
 def get_styles():
     """Get available travel styles"""
-    styles = ["Budget", "Mid-Range", "Luxury", "Adventure", "Cultural", "Relaxation"]
-    return jsonify(styles)
+    return _reference_response(_STYLES_JSON)
 
 
 @app.route('/api/interests', methods=['GET'])
 def get_interests():
     """Get available interests"""
-    interests = [
-        "History & Culture", "Food & Dining", "Adventure Sports", "Nature",
-        "Nightlife", "Shopping", "Beach", "Mountains", "Art & Museums", "Photography"
-    ]
-    return jsonify(interests)
+    return _reference_response(_INTERESTS_JSON)
 
 
 @app.route('/api/groups', methods=['GET'])
 def get_groups():
     """Get available group types"""
-    groups = ["Solo", "Couple", "Family", "Friends Group", "Corporate"]
-    return jsonify(groups)
+    return _reference_response(_GROUPS_JSON)
 
 
 @app.route('/api/autocomplete', methods=['GET'])
+@limiter.limit(Config.AUTOCOMPLETE_RATE_LIMIT)
 def api_autocomplete():
     """Autocomplete destination using free Nominatim API"""
     query = request.args.get('q', '').strip()
     if len(query) < 2:
         return jsonify([]), 200
     
+    cache_key = ' '.join(query.lower().split())
+    cached = _autocomplete_cache.get(cache_key)
+    if cached is not None:
+        return jsonify(cached), 200
+
     try:
         results = autocomplete_destination(query)
         logger.info(f"Autocomplete: {query} -> {len(results)} results")
+        if results:
+            _autocomplete_cache.set(cache_key, results)
         return jsonify(results), 200
     except Exception as e:
         logger.error(f"Autocomplete error: {str(e)}")
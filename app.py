@@ -1,5 +1,5 @@
 import streamlit as st
-from planner import planner_agent, budget_agent
+from planner import plan_and_budget
 import json
 
 st.set_page_config(page_title="Smart Travel Planner", layout="wide")
@@ -35,16 +35,44 @@ with st.sidebar:
         placeholder="e.g., wheelchair accessible, vegetarian only, kid-friendly, etc."
     )
 
+
+# The plan depends only on its inputs, so identical resubmissions are served
+# from memory instead of spending another model call (and rate limit)
+@st.cache_data(ttl=3600, max_entries=128, show_spinner=False)
+def cached_plan_and_budget(destination, days, budget, style, interests, group, special_needs):
+    return plan_and_budget(destination, days, budget, style, list(interests), group, special_needs)
+
+
 # Main content area
-if st.button("🚀 Generate My Itinerary", use_container_width=True):
+plan_inputs = (destination, days, budget, style, tuple(interests), group, special_needs)
+generate = st.button("🚀 Generate My Itinerary", use_container_width=True)
+
+if generate:
     with st.spinner("🤔 Planning your perfect trip..."):
         try:
-            # Generate itinerary
-            itinerary = planner_agent(destination, days, budget, style, interests, group, special_needs)
-            
-            # Generate budget breakdown
-            budget_info = budget_agent(destination, days, budget, style)
-            
+            # One model call returns both the itinerary and its budget breakdown
+            itinerary, budget_info = cached_plan_and_budget(*plan_inputs)
+            # Every widget change reruns the script; keep the result (and its
+            # derived display values) so those reruns redraw it as-is
+            st.session_state["last_plan"] = {
+                "inputs": plan_inputs,
+                "itinerary": itinerary,
+                "budget": budget_info,
+                "interests_text": ", ".join(interests) if interests else "Various",
+                "day_costs": [day.get("total_cost", 0) for day in itinerary.get("itinerary", [])],
+            }
+        except Exception as e:
+            st.session_state.pop("last_plan", None)
+            st.error(f"Error generating itinerary: {str(e)}")
+            st.info("Please wait a moment and try again. There might be a rate limit.")
+
+last_plan = st.session_state.get("last_plan")
+if last_plan and last_plan["inputs"] == plan_inputs:
+    itinerary, budget_info = last_plan["itinerary"], last_plan["budget"]
+    try:
+        if not itinerary and not budget_info:
+            st.info("Please wait a moment and try again. There might be a rate limit.")
+        else:
             # Display results in tabs
             tab1, tab2, tab3, tab4 = st.tabs(["📋 Daily Itinerary", "💳 Budget Breakdown", "💡 Tips & Recommendations", "🗺️ Quick Stats"])
             
@@ -52,7 +80,7 @@ if st.button("🚀 Generate My Itinerary", use_container_width=True):
                 st.subheader(f"Your {days}-Day Itinerary in {destination}")
                 
                 if "itinerary" in itinerary:
-                    for day_plan in itinerary["itinerary"]:
+                    for day_plan, day_cost in zip(itinerary["itinerary"], last_plan["day_costs"]):
                         with st.expander(f"🗓️ Day {day_plan.get('day')} - {day_plan.get('theme', 'Explore')}"):
                             col1, col2, col3 = st.columns(3)
                             
@@ -72,7 +100,7 @@ if st.button("🚀 Generate My Itinerary", use_container_width=True):
                             
                             with col3:
                                 st.write("**Day Summary**")
-                                st.metric("Daily Cost", f"${day_plan.get('total_cost', 0)}")
+                                st.metric("Daily Cost", f"${day_cost}")
             
             with tab2:
                 st.subheader("Budget Breakdown")
@@ -159,12 +187,11 @@ if st.button("🚀 Generate My Itinerary", use_container_width=True):
                 with col2:
                     st.metric("👥 Group Type", group)
                 with col3:
-                    interests_text = ", ".join(interests) if interests else "Various"
+                    interests_text = last_plan["interests_text"]
                     st.metric("❤️ Interests", interests_text[:20] + "..." if len(interests_text) > 20 else interests_text)
         
-        except Exception as e:
-            st.error(f"Error generating itinerary: {str(e)}")
-            st.info("Please wait a moment and try again. There might be a rate limit.")
+    except Exception as e:
+        st.error(f"Error displaying itinerary: {str(e)}")
 
-else:
+elif not generate:
     st.info("👈 Fill in your trip details in the sidebar and click the button to generate your personalized itinerary!")
@@ -0,0 +1,119 @@
+"""
+Shared cache storage
+- In-process dict per namespace (always on, fastest path)
+- Redis (optional, enabled by REDIS_URL) so Gunicorn workers and restarts
+  share cached upstream responses instead of each refetching them
+"""
+
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import orjson
+import redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv('REDIS_URL')
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', '50'))
+LOCK_TIMEOUT_SECONDS = 30
+
+
+@lru_cache(maxsize=1)
+def get_redis() -> Optional[redis.Redis]:
+    """Return a pooled Redis client, or None when REDIS_URL is not configured."""
+    if not REDIS_URL:
+        return None
+    pool = redis.ConnectionPool.from_url(
+        REDIS_URL,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        socket_timeout=2,
+        socket_connect_timeout=2,
+    )
+    return redis.Redis(connection_pool=pool)
+
+
+class ExpiringCache:
+    """Key/value cache with a fixed TTL, backed by Redis when available.
+
+    Values must be JSON-serializable when Redis is enabled. Returned values
+    are shared with other callers and must be treated as read-only. When
+    ``max_entries`` is set, the in-process copy evicts expired entries and
+    then the oldest ones to stay within that bound.
+    """
+
+    def __init__(self, namespace: str, ttl: int, max_entries: Optional[int] = None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _redis_key(self, key: str) -> str:
+        return f"travel:{self.namespace}:{key}"
+
+    def get(self, key: str):
+        entry = self._local.get(key)
+        if entry:
+            if time.time() < entry['expires']:
+                return entry['data']
+            with self._lock:
+                self._local.pop(key, None)
+
+        client = get_redis()
+        if client is None:
+            return None
+        try:
+            raw = client.get(self._redis_key(key))
+        except redis.RedisError as exc:
+            logger.warning('Redis get failed for %s: %s', key, exc)
+            return None
+        if raw is None:
+            return None
+        data = orjson.loads(raw)
+        self._store_local(key, data, self.ttl)
+        return data
+
+    def set(self, key: str, data, ttl: Optional[int] = None) -> None:
+        ttl = ttl or self.ttl
+        self._store_local(key, data, ttl)
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.setex(self._redis_key(key), ttl, orjson.dumps(data))
+        except (redis.RedisError, TypeError) as exc:
+            logger.warning('Redis set failed for %s: %s', key, exc)
+
+    def acquire_lock(self, key: str, timeout: int = LOCK_TIMEOUT_SECONDS) -> bool:
+        """Take the cross-worker fill lock for ``key``; always granted without Redis."""
+        client = get_redis()
+        if client is None:
+            return True
+        try:
+            return bool(client.set(self._redis_key(f"lock:{key}"), b'1', nx=True, ex=timeout))
+        except redis.RedisError as exc:
+            logger.warning('Redis lock failed for %s: %s', key, exc)
+            return True
+
+    def release_lock(self, key: str) -> None:
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.delete(self._redis_key(f"lock:{key}"))
+        except redis.RedisError as exc:
+            logger.warning('Redis unlock failed for %s: %s', key, exc)
+
+    def _store_local(self, key: str, data, ttl: int) -> None:
+        now = time.time()
+        with self._lock:
+            if self.max_entries and key not in self._local and len(self._local) >= self.max_entries:
+                for stale in [k for k, entry in self._local.items() if entry['expires'] <= now]:
+                    del self._local[stale]
+                while len(self._local) >= self.max_entries:
+                    del self._local[next(iter(self._local))]
+            self._local[key] = {'data': data, 'expires': now + ttl}
@@ -1,39 +1,64 @@
 from tavily import TavilyClient
+from http_client import build_adapter
 from state import TravelState
-import re
+from functools import lru_cache
+from types import MappingProxyType
 import os
 
 tavily = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+# The client keeps its own keep-alive session (it carries the Tavily auth
+# header, so it can't be the shared one); give it the shared pool and retries
+tavily.session.mount("https://", build_adapter())
+
+
+@lru_cache(maxsize=256)
+def _tavily_search(query: str, max_results: int):
+    """Search results for a query, cached per process.
+
+    Entries are shared between callers, so results come back as a tuple of
+    read-only mappings.
+    """
+    result = tavily.search(query=query, max_results=max_results)
+    return tuple(MappingProxyType(dict(r)) for r in result["results"])
 
 
 def extract_price(text):
-    match = re.search(r"\$([0-9]+)", text)
-    return int(match.group(1)) if match else None
+    # First "$<digits>" amount; a plain scan beats the regex engine on short snippets
+    i = text.find("$")
+    while i != -1:
+        j = i + 1
+        while j < len(text) and "0" <= text[j] <= "9":
+            j += 1
+        if j > i + 1:
+            return int(text[i + 1:j])
+        i = text.find("$", j)
+    return None
 
 
-def execute_task(task, state: TravelState):
+def fetch_task(task, state: TravelState):
+    """Run a task's lookups without mutating ``state`` (safe to call from threads).
+
+    Returns the hotel options for the human-in-loop choice, or a dict of state
+    updates for apply_task_result.
+    """
     task_text = task["task"].lower()
 
     if "flight" in task_text:
-        result = tavily.search(
-            query=f"cheap round trip flight to {state.destination}",
-            max_results=3
-        )
-        price = extract_price(result["results"][0]["content"]) or 800
-        state.flight = {
-            "price": price,
-            "arrival_time": "19:30"
+        results = _tavily_search(f"cheap round trip flight to {state.destination}", 3)
+        price = extract_price(results[0]["content"]) or 800
+        return {
+            "flight": {
+                "price": price,
+                "arrival_time": "19:30"
+            },
+            "total_cost_delta": price
         }
-        state.total_cost += price
 
     elif "hotel" in task_text:
-        result = tavily.search(
-            query=f"budget hotel in {state.destination}",
-            max_results=3
-        )
+        results = _tavily_search(f"budget hotel in {state.destination}", 3)
 
         hotels = []
-        for r in result["results"]:
+        for r in results:
             hotels.append({
                 "name": r["title"],
                 "price_per_night": extract_price(r["content"]) or 70
@@ -44,8 +69,29 @@ def execute_task(task, state: TravelState):
     elif "food" in task_text:
         daily = 25
         total = daily * state.days
-        state.food = [{
-            "daily_cost": daily,
-            "total_cost": total
-        }]
-        state.total_cost += total
+        return {
+            "food": [{
+                "daily_cost": daily,
+                "total_cost": total
+            }],
+            "total_cost_delta": total
+        }
+
+    return None
+
+
+def apply_task_result(result, state: TravelState):
+    """Fold the updates returned by fetch_task into ``state``."""
+    if not isinstance(result, dict):
+        return
+    for field in ("flight", "food"):
+        if field in result:
+            setattr(state, field, result[field])
+    state.total_cost += result.get("total_cost_delta", 0)
+
+
+def execute_task(task, state: TravelState):
+    result = fetch_task(task, state)
+    if isinstance(result, list):
+        return result  # human-in-loop
+    apply_task_result(result, state)
@@ -9,10 +9,14 @@ bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
 backlog = 2048
 
 # Worker processes
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = 'sync'
-worker_connections = 1000
-timeout = 30
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+# Every route spends its time waiting on upstream HTTP/LLM calls, so default to
+# gevent (serve via wsgi:app, which monkey-patches first); override per deploy.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+# An itinerary can wait out model rate-limit backoff well past 30s
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
 keepalive = 2
 
 # Logging (send to stdout/stderr for Render compatibility)
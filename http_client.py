@@ -0,0 +1,65 @@
+"""
+Shared outbound HTTP session
+- One pooled requests.Session per process so upstream calls reuse
+  keep-alive TCP/TLS connections instead of handshaking every time
+- Transient upstream failures (429/5xx) are retried with backoff
+- Separate connect/read timeouts: a dead host fails fast, a slow API still
+  gets its full read window
+"""
+
+import os
+from typing import Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '32'))
+POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '64'))  # kept-alive connections per upstream host
+CONNECT_TIMEOUT_SECONDS = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+# Nominatim and other free APIs reject/deprioritize the generic python-requests agent
+USER_AGENT = os.getenv('HTTP_USER_AGENT', 'TravelPlanner/1.0 (demo@example.com)')
+
+
+def timeouts(read: float) -> Tuple[float, float]:
+    """(connect, read) timeout pair for a call allowed ``read`` seconds to respond."""
+    return (min(CONNECT_TIMEOUT_SECONDS, read), read)
+
+
+def build_adapter() -> HTTPAdapter:
+    """Transport adapter with the shared pool size and retry policy.
+
+    Mount it on sessions owned by third-party clients that set their own
+    auth headers and so cannot share ``session``.
+    """
+    retry = Retry(
+        total=2,  # keep a slow upstream from pinning a worker through many attempts
+        connect=1,  # an unreachable host rarely recovers within the backoff window
+        backoff_factor=0.3,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({'GET', 'POST'}),
+        respect_retry_after_header=False,  # a 429 Retry-After can exceed the whole request budget
+        raise_on_status=False,  # hand the last response back so raise_for_status() still applies
+    )
+    return HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        pool_block=False,  # past maxsize, open a throwaway connection rather than queue
+        max_retries=retry,
+    )
+
+
+def _build_session() -> requests.Session:
+    adapter = build_adapter()
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Connection': 'keep-alive',
+    })
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+session = _build_session()
@@ -1,2 +1,11 @@
 def format_hotel_label(hotel):
     return f"{hotel['name']} — ${hotel['price_per_night']}/night"
+
+
+def choose_option(hotels):
+    for i, hotel in enumerate(hotels, 1):
+        print(f"{i}. {format_hotel_label(hotel)}")
+    while True:
+        choice = input(f"Choose a hotel [1-{len(hotels)}]: ").strip()
+        if choice.isdigit() and 1 <= int(choice) <= len(hotels):
+            return hotels[int(choice) - 1]
@@ -1,6 +1,6 @@
+from concurrent.futures import ThreadPoolExecutor
 from state import TravelState
-from planner import planner_agent
-from executor import execute_task
+from executor import apply_task_result, fetch_task
 from reviewer import reviewer_agent
 from human import choose_option
 
@@ -13,12 +13,21 @@ def run():
         preferences={"early_flights": "no"}
     )
 
-    goal = "Plan a 3-day trip to Tokyo under $2000"
-
-    tasks = planner_agent(goal)
-
-    for task in tasks:
-        result = execute_task(task, state)
+    # The executor handles flight, hotel and food lookups; planner_agent
+    # returns a full itinerary rather than a task list, so plan them directly
+    tasks = [
+        {"task": "Find a flight"},
+        {"task": "Find a hotel"},
+        {"task": "Estimate food costs"},
+    ]
+
+    # Lookups are independent network calls: run them together, then apply
+    # their updates to the state one at a time in task order
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda task: fetch_task(task, state), tasks))
+
+    for result in results:
+        apply_task_result(result, state)
 
         if isinstance(result, list):  # Human-in-loop
             chosen = choose_option(result)
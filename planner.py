@@ -1,14 +1,256 @@
-import google.generativeai as genai
+import asyncio
+import functools
 import json
+import logging
 import os
+import random
 import time
 import re
-from typing import Any, Dict, List, Optional, Tuple
+import string
+import textwrap
+import threading
+from itertools import chain
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
 
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+from google.api_core.exceptions import TooManyRequests
+
+from response_cache import ResponseCache, cache_key
+
+if TYPE_CHECKING:
+    import google.generativeai as genai
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # plain-json fallback; orjson.JSONDecodeError subclasses json's
+    _json_loads = json.loads
 
 # Keep the requested model; do not force JSON mode (unsupported on this model)
-MODEL = genai.GenerativeModel("gemma-3-4b-it")
+MODEL_NAME = "gemma-3-4b-it"
+
+logger = logging.getLogger(__name__)
+
+MAX_MODEL_ATTEMPTS = 3
+# Unhinted 429s are usually the per-minute quota: 24s then 36s (plus jitter)
+# spans a full minute across the two retries instead of failing within seconds
+RETRY_BASE_DELAY_SECONDS = 24
+MAX_RETRY_DELAY_SECONDS = 60
+# Local request budget kept under the model's requests-per-minute quota (0 disables)
+GEMINI_QPM = int(os.getenv("GEMINI_QPM", "30"))
+# Hard ceiling on reply length (the model's own output limit) so a runaway
+# reply can't stream indefinitely; a multi-day combined plan needs several
+# thousand tokens, so tune down only against observed reply sizes
+GEMINI_MAX_OUTPUT_TOKENS = int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS", "8192"))
+GEMINI_TEMPERATURE = float(os.getenv("GEMINI_TEMPERATURE", "0.4"))
+# Deadline for one whole streamed reply; stays under gunicorn's worker timeout
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "90"))
+
+_rate_bucket = {"tokens": float(GEMINI_QPM), "ts": time.monotonic()}
+_rate_lock = threading.Lock()
+_response_cache = ResponseCache()
+
+# Repair pattern for noisy model JSON: one left-to-right scan that consumes
+# each string literal whole, so the fixes outside strings never touch text
+# inside them (times like "09:00-11:00", dates, prose commas):
+#   string literal: raw newlines/tabs (invalid inside JSON strings) -> spaces
+#   comma: trailing before } or ], or doubled -> dropped
+#   numeric range ("3500 - 4500", "6-8") as a bare value -> midpoint
+_JSON_REPAIR_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|,(?=\s*[,}\]])|(\d+)\s*-\s*(\d+)', re.S)
+_STRING_WS_FIX = str.maketrans("\n\r\t", "   ")
+_JSON_STRUCTURE_RE = re.compile(r'[{}"\\]')
+# C0 control characters other than the \t, \n and \r JSON allows as whitespace
+_CTRL_STRIP = str.maketrans(dict.fromkeys(chr(i) for i in range(32) if chr(i) not in "\t\n\r"))
+
+
+class _ObjectScanner:
+    """Incremental search for the end of the first top-level {...} object.
+
+    ``scan`` can be called repeatedly on a growing buffer (e.g. streamed
+    chunks joined so far) and resumes where it stopped. Only structural
+    characters are visited; braces inside string values (or after an escape)
+    don't count.
+    """
+
+    def __init__(self):
+        self.start = -1
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped_pos = -1
+
+    def skip(self) -> None:
+        """Drop the object just found and look for the next one after it."""
+        self.start = -1
+        self._depth = 0
+        self._in_string = False
+
+    def scan(self, buffer: str) -> Optional[int]:
+        """Index of the object's closing brace, or None if it hasn't closed yet."""
+        if self.start == -1:
+            begin = buffer.find("{", self._pos)
+            if begin == -1:
+                self._pos = len(buffer)
+                return None
+            self.start = self._pos = begin
+        for match in _JSON_STRUCTURE_RE.finditer(buffer, self._pos):
+            pos = match.start()
+            if pos == self._escaped_pos:
+                continue
+            char = match.group()
+            if char == "\\":
+                self._escaped_pos = pos + 1
+            elif char == '"':
+                self._in_string = not self._in_string
+            elif self._in_string:
+                continue
+            elif char == "{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pos = pos + 1
+                    return pos
+        self._pos = len(buffer)
+        return None
+
+
+def _slice_balanced(text: str) -> Optional[str]:
+    """First complete {...} object in ``text``, or None if it never closes."""
+    scanner = _ObjectScanner()
+    end = scanner.scan(text)
+    return text[scanner.start:end + 1] if end is not None else None
+
+
+def _repair_token(match):
+    if match.group(1) is not None:
+        return str((int(match.group(1)) + int(match.group(2))) // 2)
+    token = match.group(0)
+    if token == ",":
+        return ""
+    return token.translate(_STRING_WS_FIX)
+
+
+def _retry_hint_seconds(exc: TooManyRequests) -> Optional[float]:
+    """Wait the server asked for: gRPC RetryInfo detail or an HTTP Retry-After header."""
+    for detail in getattr(exc, 'details', None) or ():
+        delay = getattr(detail, 'retry_delay', None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+    headers = getattr(exc.response, 'headers', None) or {}
+    try:
+        return float(headers['Retry-After'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _with_retries(fn):
+    """Retry rate-limited model calls with jittered exponential backoff."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        for attempt in range(MAX_MODEL_ATTEMPTS):
+            try:
+                return fn(*args, **kwargs)
+            except TooManyRequests as e:  # includes gRPC ResourceExhausted
+                if attempt == MAX_MODEL_ATTEMPTS - 1:
+                    raise
+                hint = _retry_hint_seconds(e)
+                if hint is None:
+                    # Jitter keeps workers throttled together from retrying in lockstep
+                    hint = RETRY_BASE_DELAY_SECONDS * 1.5 ** attempt + random.uniform(0, 1)
+                delay = min(MAX_RETRY_DELAY_SECONDS, hint)
+                logger.warning("Rate limit hit. Retrying in %.1f seconds...", delay)
+                time.sleep(delay)
+    return wrapper
+
+
+@functools.lru_cache(maxsize=1)
+def get_model() -> "genai.GenerativeModel":
+    """Process-wide model handle, built on first use and reused by every call
+    (and every Streamlit rerun) so its client channel stays warm."""
+    # The SDK takes a few hundred ms to import; only pay that once a reply
+    # is actually needed, not for cache hits or importing the normalisers
+    import google.generativeai as genai
+
+    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    return genai.GenerativeModel(
+        MODEL_NAME,
+        # No "```" stop sequence: replies usually open with a fence
+        generation_config={
+            "max_output_tokens": GEMINI_MAX_OUTPUT_TOKENS,
+            "temperature": GEMINI_TEMPERATURE,
+        },
+    )
+
+
+def _acquire_token() -> None:
+    """Wait until the per-process token bucket allows another model request."""
+    if GEMINI_QPM <= 0:
+        return
+    refill_per_second = GEMINI_QPM / 60.0
+    while True:
+        with _rate_lock:
+            now = time.monotonic()
+            tokens = min(float(GEMINI_QPM),
+                         _rate_bucket["tokens"] + (now - _rate_bucket["ts"]) * refill_per_second)
+            _rate_bucket["ts"] = now
+            if tokens >= 1:
+                _rate_bucket["tokens"] = tokens - 1
+                return
+            _rate_bucket["tokens"] = tokens
+            wait = (1 - tokens) / refill_per_second
+        time.sleep(wait)
+
+
+@_with_retries
+def _generate(prompt: str) -> str:
+    """Stream the model's reply and return its text.
+
+    Chunks are scanned for a complete JSON object as they arrive; once one
+    parses, the stream is abandoned and that object is returned without
+    waiting for trailing tokens (closing fences, sign-off prose).
+    """
+    _acquire_token()
+    received = ""
+    scanner = _ObjectScanner()
+    stream = get_model().generate_content(
+        prompt, stream=True, request_options={"timeout": GEMINI_TIMEOUT_SECONDS}
+    )
+    for chunk in stream:
+        try:
+            received += chunk.text
+        except ValueError:  # chunk without text parts (e.g. a trailing finish marker)
+            continue
+        end = scanner.scan(received)
+        while end is not None:
+            candidate = received[scanner.start:end + 1]
+            try:
+                _json_loads(candidate)
+            except json.JSONDecodeError:
+                # Not the payload (e.g. braces in leading prose); look past it
+                scanner.skip()
+                end = scanner.scan(received)
+                continue
+            return candidate
+    return received.strip()
+
+
+def _complete(prompt: str, force_refresh: bool = False, key_prompt: Optional[str] = None):
+    """Parsed JSON reply for ``prompt``, served from the response cache when allowed.
+
+    ``key_prompt`` is the same prompt rendered from normalised inputs, so
+    trivially different trips share an entry while the model still gets
+    ``prompt``; it defaults to ``prompt``. ``force_refresh`` skips the cache
+    lookup; the fresh reply still replaces the entry.
+    """
+    # A reply made under other sampling settings must not be served for these
+    key = cache_key(MODEL_NAME, key_prompt or prompt, GEMINI_TEMPERATURE, GEMINI_MAX_OUTPUT_TOKENS)
+    cached = None if force_refresh else _response_cache.get(key)
+    if cached is not None:
+        return _parse_json_safe(cached)
+    text = _generate(prompt)
+    result = _parse_json_safe(text)
+    _response_cache.set(key, text)  # only replies that parsed are worth replaying
+    return result
 
 
 def _parse_json_safe(text: str):
@@ -16,59 +258,54 @@ def _parse_json_safe(text: str):
     if not text:
         raise ValueError("Empty model response")
 
-    # Remove code fences if present
+    # Remove code fences if present; slice off the opening fence line and the
+    # closing fence instead of rewriting the whole response twice
     if text.startswith("```"):
-        text = text.replace("```json", "").replace("```", "").strip()
+        newline = text.find("\n")
+        text = text[newline + 1:] if newline != -1 else text[3:]
+        text = text.rstrip()
+        if text.endswith("```"):
+            text = text[:-3]
+        text = text.strip()
 
     # First attempt
     try:
-        return json.loads(text)
+        return _json_loads(text)
     except json.JSONDecodeError:
         pass
 
-    # Try slicing from first { to last }
-    start = text.find("{")
-    end = text.rfind("}") + 1
-    if start != -1 and end > start:
-        sliced = text[start:end]
+    # Raw control characters (which the model sometimes emits inside strings)
+    # are invalid JSON anywhere; drop them in one C-level pass
+    text = text.translate(_CTRL_STRIP)
+
+    # Slice out the first balanced {...} object, ignoring prose or stray braces
+    # around it; a truncated reply has none, so fall back to first { .. last }
+    sliced = _slice_balanced(text)
+    if sliced is None:
+        start = text.find("{")
+        end = text.rfind("}") + 1
+        if start != -1 and end > start:
+            sliced = text[start:end]
+    if sliced is not None:
         try:
-            return json.loads(sliced)
+            return _json_loads(sliced)
         except json.JSONDecodeError:
             text = sliced
 
-    # Remove trailing commas before } or ]
-    cleaned = re.sub(r",\s*([}\]])", r"\1", text)
-    
-    # Remove duplicate commas
-    cleaned = re.sub(r",\s*,", ",", cleaned)
-    
-    # Fix ALL number ranges (e.g., "3500 - 4500" or "6-8") -> use midpoint
-    # Handles ranges in any numeric context
-    def replace_range_with_midpoint(match):
+    # Fix every known model mistake in a single pass, then re-parse
+    cleaned = _JSON_REPAIR_RE.sub(_repair_token, text)
+    if cleaned != text:
         try:
-            num_str = match.group(0)
-            # Extract numbers from patterns like "3500 - 4500" or "6-8"
-            numbers = re.findall(r'\d+', num_str)
-            if len(numbers) >= 2:
-                avg = sum(int(n) for n in numbers[:2]) // 2
-                return str(avg)
-        except:
+            return _json_loads(cleaned)
+        except json.JSONDecodeError:
             pass
-        return match.group(0)
-    
-    # Replace all numeric ranges with their midpoint
-    cleaned = re.sub(r'\d+\s*-\s*\d+', replace_range_with_midpoint, cleaned)
-    
-    # Remove unescaped newlines inside string values
-    cleaned = re.sub(r':\s*"([^"]*)\n([^"]*)"', lambda m: f': "{m.group(1)} {m.group(2)}"', cleaned)
-    
-    # Try to parse cleaned version
+
+    # orjson has rejected every candidate; the stdlib parser is more lenient
+    # (NaN/Infinity, integers past 64 bits) and reports where it still breaks
     try:
         return json.loads(cleaned)
     except json.JSONDecodeError as e:
         # Log snippet around error for debugging
-        import logging
-        logger = logging.getLogger(__name__)
         logger.error(f"JSON parse failed at char {e.pos}: {cleaned[max(0, e.pos-50):e.pos+50]}")
         raise
 
@@ -183,28 +420,96 @@ Format:
 }}
 """
 
-MEAL_WINDOWS = (
-    {'type': 'breakfast', 'label': 'Breakfast', 'start': 6 * 60 + 30, 'end': 10 * 60},
-    {'type': 'lunch', 'label': 'Lunch', 'start': 11 * 60 + 30, 'end': 14 * 60 + 30},
-    {'type': 'snack', 'label': 'Snacks', 'start': 15 * 60, 'end': 17 * 60 + 30},
-    {'type': 'dinner', 'label': 'Dinner', 'start': 18 * 60, 'end': 21 * 60 + 30},
+
+def _format_section(template: str, indent: str = "  ") -> str:
+    """The JSON skeleton after "Format:", indented to nest inside another object."""
+    return textwrap.indent(template.split("Format:\n", 1)[1].strip(), indent).lstrip()
+
+
+# Itinerary and budget in one request: same inputs and rules as the two
+# prompts above, answered as a single JSON object with both parts
+COMBINED_PROMPT = (
+    ITINERARY_PROMPT.split("Format:", 1)[0].rstrip()
+    + """
+- Also produce the budget breakdown for the same trip: daily budget limits, cost per category, money saving tips specific to this destination and an estimated total; totals must reflect all {travelers} travelers
+
+Format:
+{{
+  "itinerary": """ + _format_section(ITINERARY_PROMPT) + """,
+  "budget": """ + _format_section(BUDGET_PROMPT) + """
+}}
+"""
 )
 
-TRAVEL_ACTIVITY_KEYWORDS = (
-    'travel', 'transfer', 'transit', 'journey', 'drive', 'flight', 'train', 'depart',
-    'arrival', 'commute', 'ferry', 'bus'
+# Several independent trips in one request: the itinerary instructions once,
+# then one input block per trip. The answer is wrapped in an object rather
+# than a bare array so the usual object slicing and repair still apply.
+_TRIP_INPUT_PROMPT = "=== TRIP {number} ===\n" + ITINERARY_PROMPT[
+    ITINERARY_PROMPT.index("INPUT:\n") + len("INPUT:\n"):ITINERARY_PROMPT.index("Create a detailed")
+]
+BATCH_ITINERARY_PROMPT = (
+    ITINERARY_PROMPT.split("INPUT:", 1)[0].rstrip()
+    + """ Plan every trip below independently.
+
+{trips}
+"""
+    + ITINERARY_PROMPT[ITINERARY_PROMPT.index("Create a detailed"):ITINERARY_PROMPT.index("Format:")]
+    .replace("Create a detailed JSON itinerary", "For each trip, create a detailed JSON itinerary")
+    .replace("{travelers} travelers", "travelers listed for that trip")
+    .rstrip()
+    + """
+- Return exactly one itinerary per trip, in the order the trips are listed
+
+Format:
+{{
+  "trips": [
+    """ + _format_section(ITINERARY_PROMPT, "    ") + """
+  ]
+}}
+"""
 )
 
-MAX_SCHEDULED_MEALS = 3
-MIN_DAY_SPAN_MINUTES = 14 * 60
 
+def _compile_prompt(template: str) -> Tuple[Tuple[str, Optional[str]], ...]:
+    """Split a str.format template once into (literal, field name) pieces."""
+    return tuple((literal, field) for literal, field, _, _ in string.Formatter().parse(template))
 
-def planner_agent(destination: str, days: int, budget: float, style: str,
-                  interests: list, group: str, special_needs: str, source: str,
-                  travelers: int = 1):
-    """Generate comprehensive travel itinerary"""
-    
-    prompt = ITINERARY_PROMPT.format(
+
+def _render_prompt(compiled: Tuple[Tuple[str, Optional[str]], ...], **fields: Any) -> str:
+    """Fill a compiled template without re-parsing it (same output as str.format)."""
+    parts = []
+    for literal, field in compiled:
+        parts.append(literal)
+        if field is not None:
+            parts.append(str(fields[field]))
+    return "".join(parts)
+
+
+_ITINERARY_TEMPLATE = _compile_prompt(ITINERARY_PROMPT)
+_BUDGET_TEMPLATE = _compile_prompt(BUDGET_PROMPT)
+_COMBINED_TEMPLATE = _compile_prompt(COMBINED_PROMPT)
+_TRIP_INPUT_TEMPLATE = _compile_prompt(_TRIP_INPUT_PROMPT)
+_BATCH_ITINERARY_TEMPLATE = _compile_prompt(BATCH_ITINERARY_PROMPT)
+
+def _normalize_input(value: Any) -> Any:
+    """Cache-key form of a prompt input: strings lowercased with whitespace
+    collapsed (so "Tokyo " and "tokyo" share an entry), tuples element-wise.
+    Only used for keys; the model always sees the inputs as given."""
+    if isinstance(value, str):
+        return " ".join(value.split()).lower()
+    if isinstance(value, tuple):
+        return tuple(map(_normalize_input, value))
+    return value
+
+
+# Rendered prompts are memoised per parameter set: re-submitting the same
+# trip (common while tweaking the UI) skips the rendering along with the model
+@functools.lru_cache(maxsize=128)
+def _trip_prompt(template: Tuple[Tuple[str, Optional[str]], ...], source: str, destination: str,
+                 days: int, budget: float, style: str, interests: Tuple[str, ...], group: str,
+                 special_needs: str, travelers: int) -> str:
+    return _render_prompt(
+        template,
         source=source,
         destination=destination,
         days=days,
@@ -216,26 +521,12 @@ def planner_agent(destination: str, days: int, budget: float, style: str,
         travelers=max(1, travelers)
     )
 
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-          response = MODEL.generate_content(prompt)
-          text = (response.text or "").strip()
-          return _parse_json_safe(text)
-        except Exception as e:
-            if "429" in str(e) and attempt < max_retries - 1:
-                wait_time = 15 * (attempt + 1)
-                print(f"Rate limit hit. Waiting {wait_time} seconds...")
-                time.sleep(wait_time)
-            else:
-                raise
-
 
-def budget_agent(destination: str, days: int, budget: float, style: str, source: str,
-                 travelers: int = 1):
-    """Generate detailed budget breakdown"""
-    
-    prompt = BUDGET_PROMPT.format(
+@functools.lru_cache(maxsize=128)
+def _budget_prompt(source: str, destination: str, days: int, budget: float, style: str,
+                   travelers: int) -> str:
+    return _render_prompt(
+        _BUDGET_TEMPLATE,
         destination=destination,
         days=days,
         budget=budget,
@@ -244,25 +535,133 @@ def budget_agent(destination: str, days: int, budget: float, style: str, source:
         travelers=max(1, travelers)
     )
 
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-          response = MODEL.generate_content(prompt)
-          text = (response.text or "").strip()
-          return _parse_json_safe(text)
-        except Exception as e:
-            if "429" in str(e) and attempt < max_retries - 1:
-                wait_time = 15 * (attempt + 1)
-                print(f"Rate limit hit. Waiting {wait_time} seconds...")
-                time.sleep(wait_time)
-            else:
-                raise
+
+MEAL_WINDOWS = (
+    {'type': 'breakfast', 'label': 'Breakfast', 'start': 6 * 60 + 30, 'end': 10 * 60},
+    {'type': 'lunch', 'label': 'Lunch', 'start': 11 * 60 + 30, 'end': 14 * 60 + 30},
+    {'type': 'snack', 'label': 'Snacks', 'start': 15 * 60, 'end': 17 * 60 + 30},
+    {'type': 'dinner', 'label': 'Dinner', 'start': 18 * 60, 'end': 21 * 60 + 30},
+)
+
+TRAVEL_ACTIVITY_KEYWORDS = (
+    'travel', 'transfer', 'transit', 'journey', 'drive', 'flight', 'train', 'depart',
+    'arrival', 'commute', 'ferry', 'bus'
+)
+
+_TRAVEL_KEYWORD_RE = re.compile('|'.join(map(re.escape, TRAVEL_ACTIVITY_KEYWORDS)), re.IGNORECASE)
+
+MAX_SCHEDULED_MEALS = 3
+MIN_DAY_SPAN_MINUTES = 14 * 60
+_CLOCK_TIME_RE = re.compile(r'^(\d{1,2})(?::(\d{2}))?\s*(am|pm)?')
+
+
+def planner_agent(destination: str, days: int, budget: float, style: str,
+                  interests: list, group: str, special_needs: str, source: str = "",
+                  travelers: int = 1, force_refresh: bool = False):
+    """Generate comprehensive travel itinerary"""
+    
+    inputs = (source, destination, days, budget, style, tuple(interests), group, special_needs,
+              travelers)
+    prompt = _trip_prompt(_ITINERARY_TEMPLATE, *inputs)
+    key_prompt = _trip_prompt(_ITINERARY_TEMPLATE, *map(_normalize_input, inputs))
+    return _complete(prompt, force_refresh, key_prompt)
+
+
+def budget_agent(destination: str, days: int, budget: float, style: str, source: str = "",
+                 travelers: int = 1, force_refresh: bool = False):
+    """Generate detailed budget breakdown"""
+    
+    inputs = (source, destination, days, budget, style, travelers)
+    prompt = _budget_prompt(*inputs)
+    key_prompt = _budget_prompt(*map(_normalize_input, inputs))
+    return _complete(prompt, force_refresh, key_prompt)
+
+
+def plan_and_budget(destination: str, days: int, budget: float, style: str,
+                    interests: list, group: str, special_needs: str, source: str = "",
+                    travelers: int = 1, force_refresh: bool = False) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Generate the itinerary and its budget breakdown with a single model call"""
+
+    inputs = (source, destination, days, budget, style, tuple(interests), group, special_needs,
+              travelers)
+    prompt = _trip_prompt(_COMBINED_TEMPLATE, *inputs)
+    key_prompt = _trip_prompt(_COMBINED_TEMPLATE, *map(_normalize_input, inputs))
+    result = _complete(prompt, force_refresh, key_prompt)
+    if not isinstance(result, dict):
+        raise ValueError("Model response is not a JSON object")
+    return result.get("itinerary") or {}, result.get("budget") or {}
+
+
+def planner_agent_batch(trips: List[Dict[str, Any]], force_refresh: bool = False) -> List[Dict[str, Any]]:
+    """Generate itineraries for several trips with a single model call
+
+    Each trip is a dict of planner_agent's keyword arguments; itineraries are
+    returned in the same order. Keep batches small: every itinerary shares one
+    response's output-token limit.
+    """
+    if not trips:
+        return []
+
+    prompt = _batch_prompt(trips)
+    key_prompt = _batch_prompt(trips, _normalize_input)
+    result = _complete(prompt, force_refresh, key_prompt)
+    plans = result.get("trips") if isinstance(result, dict) else None
+    if not isinstance(plans, list) or len(plans) != len(trips):
+        raise ValueError(f"Expected {len(trips)} itineraries in the batch response")
+    return plans
+
+
+def _batch_prompt(trips: List[Dict[str, Any]], prepare: Callable[[Any], Any] = lambda value: value) -> str:
+    """Batch prompt for ``trips``; ``prepare`` is applied to every trip input."""
+    blocks = []
+    for number, trip in enumerate(trips, 1):
+        blocks.append(_render_prompt(
+            _TRIP_INPUT_TEMPLATE,
+            number=number,
+            source=prepare(trip.get("source", "")),
+            destination=prepare(trip["destination"]),
+            days=trip["days"],
+            budget=trip["budget"],
+            style=prepare(trip["style"]),
+            interests=", ".join(prepare(tuple(trip.get("interests") or ()))),
+            group=prepare(trip["group"]),
+            special_needs=prepare(trip.get("special_needs") or "") or "None",
+            travelers=max(1, trip.get("travelers", 1))
+        ))
+    return _render_prompt(_BATCH_ITINERARY_TEMPLATE, trips="\n".join(blocks))
+
+
+async def planner_agent_async(*args, **kwargs):
+    """planner_agent on a worker thread, for asyncio callers"""
+    return await asyncio.to_thread(planner_agent, *args, **kwargs)
+
+
+async def budget_agent_async(*args, **kwargs):
+    """budget_agent on a worker thread, for asyncio callers"""
+    return await asyncio.to_thread(budget_agent, *args, **kwargs)
+
+
+async def gather_plan_and_budget(destination: str, days: int, budget: float, style: str,
+                                 interests: list, group: str, special_needs: str, source: str = "",
+                                 travelers: int = 1, force_refresh: bool = False) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Run the itinerary and budget prompts concurrently; returns (itinerary, budget)"""
+    itinerary, budget_info = await asyncio.gather(
+        planner_agent_async(destination, days, budget, style, interests, group,
+                            special_needs, source, travelers, force_refresh),
+        budget_agent_async(destination, days, budget, style, source, travelers, force_refresh),
+    )
+    return itinerary, budget_info
 
 def _coerce_cost(value: Any) -> int:
+    # Model output and already-normalised entries are almost always plain ints
+    kind = type(value)
+    if kind is int:
+        return value if value >= 0 else 0
     try:
-        return max(0, int(float(value)))
+        cost = int(value) if kind is float else int(float(value))
     except (TypeError, ValueError):
         return 0
+    return cost if cost >= 0 else 0
 
 
 def normalize_itinerary_costs(itinerary: Dict[str, Any], total_budget: float, days: int) -> Dict[str, Any]:
@@ -279,32 +678,41 @@ def normalize_itinerary_costs(itinerary: Dict[str, Any], total_budget: float, da
     per_day_base = safe_budget / days
     per_day_cap = max(60.0, per_day_base * 1.2)
     per_entry_cap = max(10.0, min(per_day_cap * 0.5, per_day_base * 0.35, 95.0))
+    entry_cap = int(per_entry_cap)
 
     for day in schedule:
         if not isinstance(day, dict):
             continue
-        bucket_entries: List[Dict[str, Any]] = []
+        activities = day.get('activities')
+        meals = day.get('meals')
+        if not isinstance(activities, list):
+            activities = ()
+        if not isinstance(meals, list):
+            meals = ()
         day_total = 0
-        for bucket_name in ('activities', 'meals'):
-            bucket = day.get(bucket_name) or []
-            if not isinstance(bucket, list):
+        for entry in chain(activities, meals):
+            # Entries are nearly always dicts: let the odd string/number
+            # fail the .get instead of type-checking every one
+            try:
+                raw = entry.get('cost')
+            except AttributeError:
                 continue
-            for entry in bucket:
-                if not isinstance(entry, dict):
-                    continue
-                cost = _coerce_cost(entry.get('cost'))
-                if cost > per_entry_cap:
-                    cost = int(per_entry_cap)
+            cost = _coerce_cost(raw)
+            if cost > per_entry_cap:
+                cost = entry_cap
+            if cost is not raw:  # an in-range int comes back as the same object
                 entry['cost'] = cost
-                bucket_entries.append(entry)
-                day_total += cost
+            day_total += cost
 
-        if day_total > per_day_cap and day_total > 0:
+        if day_total > per_day_cap:
+            # Rare over-budget day: every dict entry now holds a clean int cost
             ratio = per_day_cap / day_total
             adjusted_total = 0
-            for entry in bucket_entries:
-                new_cost = int(max(0, round(entry.get('cost', 0) * ratio)))
-                entry['cost'] = new_cost
+            for entry in chain(activities, meals):
+                try:
+                    entry['cost'] = new_cost = round(entry['cost'] * ratio)
+                except TypeError:  # not a dict entry
+                    continue
                 adjusted_total += new_cost
             day_total = adjusted_total
 
@@ -313,6 +721,16 @@ def normalize_itinerary_costs(itinerary: Dict[str, Any], total_budget: float, da
     return itinerary
 
 
+# (breakdown key, amount field, share of the per-day budget it may claim)
+_BUDGET_CATEGORIES = (
+    ('accommodation', 'subtotal', 0.55),
+    ('food', 'subtotal', 0.25),
+    ('activities', 'estimated', 0.3),
+    ('transport', 'estimated', 0.35),
+    ('contingency', 'amount', 0.15),
+)
+
+
 def normalize_budget_estimate(budget_data: Dict[str, Any], total_budget: float, days: int) -> Dict[str, Any]:
     """Ensure budget breakdown stays within the user-specified limits."""
     if not budget_data or not isinstance(budget_data, dict):
@@ -330,28 +748,12 @@ def normalize_budget_estimate(budget_data: Dict[str, Any], total_budget: float,
         return budget_data
 
     per_day_base = safe_total / days
-    category_caps = {
-        'accommodation': per_day_base * 0.55,
-        'food': per_day_base * 0.25,
-        'activities': per_day_base * 0.3,
-        'transport': per_day_base * 0.35,
-        'contingency': per_day_base * 0.15,
-    }
-
     tracked_fields = []
-    for key, cap in category_caps.items():
-        section = breakdown.get(key)
-        if not isinstance(section, dict):
+    for key, field, share in _BUDGET_CATEGORIES:
+        if not isinstance(section := breakdown.get(key), dict):
             continue
-        field = 'subtotal'
-        if key in ('activities', 'transport'):
-            field = 'estimated'
-        if key == 'contingency':
-            field = 'amount'
-
-        raw_value = _coerce_cost(section.get(field))
-        section[field] = int(min(raw_value, cap)) if cap else raw_value
-        tracked_fields.append((section, field, section[field]))
+        section[field] = value = int(min(_coerce_cost(section.get(field)), per_day_base * share))
+        tracked_fields.append((section, field, value))
 
         if 'per_night' in section:
             section['per_night'] = int(min(_coerce_cost(section['per_night']), per_day_base * 0.55))
@@ -369,20 +771,27 @@ def normalize_budget_estimate(budget_data: Dict[str, Any], total_budget: float,
 
 def _parse_minutes(value: Any) -> Optional[int]:
     if isinstance(value, str):
-        text = value.strip().lower()
-        match = re.match(r'^(\d{1,2})(?::(\d{2}))?\s*(am|pm)?', text)
-        if match:
-            hour = int(match.group(1)) % 24
-            minute = int(match.group(2) or 0)
-            meridian = match.group(3)
-            if meridian == 'pm' and hour != 12:
-                hour += 12
-            if meridian == 'am' and hour == 12:
-                hour = 0
-            return hour * 60 + minute
+        return _parse_clock_time(value)
     return None
 
 
+@functools.lru_cache(maxsize=512)
+def _parse_clock_time(value: str) -> Optional[int]:
+    # An itinerary reuses a handful of time strings ("09:00", "1:30 pm") across
+    # every day and is read by the range, window and overlap helpers alike
+    match = _CLOCK_TIME_RE.match(value.strip().lower())
+    if not match:
+        return None
+    hour = int(match.group(1)) % 24
+    minute = int(match.group(2) or 0)
+    meridian = match.group(3)
+    if meridian == 'pm' and hour != 12:
+        hour += 12
+    if meridian == 'am' and hour == 12:
+        hour = 0
+    return hour * 60 + minute
+
+
 def _format_minutes(total_minutes: int) -> str:
     total_minutes = max(0, min(total_minutes, 23 * 60 + 59))
     hour = total_minutes // 60
@@ -395,12 +804,13 @@ def _clamp_minutes(value: int, min_value: int, max_value: int) -> int:
 
 
 def _is_travel_entry(entry: Dict[str, Any]) -> bool:
-    blob = ' '.join([
-        str(entry.get('activity', '')),
-        str(entry.get('description', '')),
-        str(entry.get('tip', ''))
-    ]).lower()
-    return any(keyword in blob for keyword in TRAVEL_ACTIVITY_KEYWORDS)
+    for field in ('activity', 'description', 'tip'):
+        value = entry.get(field)
+        if value is None:
+            continue
+        if _TRAVEL_KEYWORD_RE.search(value if isinstance(value, str) else str(value)):
+            return True
+    return False
 
 
 def _activity_range(entry: Dict[str, Any]) -> Optional[Tuple[int, int]]:
@@ -415,17 +825,17 @@ def _activity_range(entry: Dict[str, Any]) -> Optional[Tuple[int, int]]:
     return start, start + duration
 
 
-def _window_overlaps_travel(window: Dict[str, int], activities: List[Dict[str, Any]]) -> bool:
-    for entry in activities:
-        if not isinstance(entry, dict) or not _is_travel_entry(entry):
-            continue
-        span = _activity_range(entry)
-        if not span:
-            continue
-        start, end = span
-        if end >= window['start'] and start <= window['end']:
-            return True
-    return False
+def _travel_ranges(activities: List[Dict[str, Any]]) -> List[Tuple[int, int]]:
+    """(start, end) minutes of the day's timed travel activities."""
+    return [
+        span for entry in activities
+        if isinstance(entry, dict) and _is_travel_entry(entry) and (span := _activity_range(entry))
+    ]
+
+
+def _window_overlaps_travel(window: Dict[str, int], travel_ranges: List[Tuple[int, int]]) -> bool:
+    window_start, window_end = window['start'], window['end']
+    return any(end >= window_start and start <= window_end for start, end in travel_ranges)
 
 
 def _infer_day_window(activities: List[Dict[str, Any]]) -> Tuple[int, int]:
@@ -450,6 +860,8 @@ def schedule_meals(day_activities: List[Dict[str, Any]]) -> List[Dict[str, Any]]
         return []
 
     day_start, day_end = _infer_day_window(day_activities)
+    # Classify and time the travel entries once, not once per meal window
+    travel_ranges = _travel_ranges(day_activities)
     scheduled = []
 
     for window in MEAL_WINDOWS:
@@ -457,7 +869,7 @@ def schedule_meals(day_activities: List[Dict[str, Any]]) -> List[Dict[str, Any]]
             break
         if window['end'] < day_start - 60 or window['start'] > day_end + 60:
             continue
-        if _window_overlaps_travel(window, day_activities):
+        if _window_overlaps_travel(window, travel_ranges):
             continue
         midpoint = int((window['start'] + window['end']) / 2)
         scheduled.append({
@@ -512,8 +924,10 @@ def _recompute_day_totals(itinerary: Dict[str, Any]) -> None:
         total = 0
         for bucket in ('activities', 'meals'):
             for entry in day.get(bucket, []) or []:
-                if isinstance(entry, dict):
+                try:
                     total += _coerce_cost(entry.get('cost'))
+                except AttributeError:  # not a dict entry
+                    continue
         day['total_cost'] = total
 
 
@@ -0,0 +1,120 @@
+"""
+Persistent model response cache
+- Raw model replies stored in a local SQLite file, keyed by a SHA-256 of the
+  model name, its generation settings and the exact prompt
+- Survives restarts and is shared by every process on the host, so repeating
+  an identical trip request never pays for another model call
+- CACHE_POLICY selects the behaviour: enabled (read + write), readonly (read,
+  never write), replay (read, fail on a miss) or disabled
+- Entries older than LLM_CACHE_TTL_SECONDS are treated as misses (0 keeps them
+  forever); replay ignores the TTL so recorded fixtures never go stale
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_POLICIES = ('enabled', 'readonly', 'replay', 'disabled')
+CACHE_POLICY = os.getenv('CACHE_POLICY', 'enabled').lower()
+CACHE_PATH = os.getenv('LLM_CACHE_PATH', os.path.expanduser('~/.travel_planner_cache.sqlite'))
+CACHE_TTL_SECONDS = int(os.getenv('LLM_CACHE_TTL_SECONDS', str(24 * 3600)))
+
+if CACHE_POLICY not in CACHE_POLICIES:
+    logger.warning('Unknown CACHE_POLICY %r; using "enabled"', CACHE_POLICY)
+    CACHE_POLICY = 'enabled'
+
+
+class CacheMiss(LookupError):
+    """Raised under the replay policy when a prompt has no stored response."""
+
+
+def cache_key(model: str, prompt: str, *settings: Any) -> str:
+    """Key for a reply to ``prompt``; ``settings`` are the generation options
+    (temperature, output limit, ...) that shape the reply.
+
+    The prompt is hashed verbatim: callers normalise their input fields
+    before rendering it.
+    """
+    header = '\n'.join(map(repr, (model, *settings)))
+    return hashlib.sha256(f'{header}\n\n{prompt}'.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed store of raw model replies.
+
+    Storage errors are logged and treated as misses; the cache never makes a
+    model call fail.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, policy: str = CACHE_POLICY,
+                 ttl_seconds: int = CACHE_TTL_SECONDS):
+        self.path = path
+        self.policy = policy
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    @property
+    def readable(self) -> bool:
+        return self.policy != 'disabled'
+
+    @property
+    def writable(self) -> bool:
+        return self.policy == 'enabled'
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads; keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')  # readers don't block the writer
+            self._local.conn = conn
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.execute(
+                        'CREATE TABLE IF NOT EXISTS responses ('
+                        'key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)'
+                    )
+                    conn.commit()
+                    self._schema_ready = True
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.readable:
+            return None
+        query = 'SELECT response FROM responses WHERE key = ?'
+        params: tuple = (key,)
+        if self.ttl_seconds > 0 and self.policy != 'replay':
+            query += ' AND created_at >= ?'
+            params = (key, time.time() - self.ttl_seconds)
+        try:
+            row = self._connection().execute(query, params).fetchone()
+        except sqlite3.Error as exc:
+            logger.warning('Response cache read failed: %s', exc)
+            return None
+        if row is None:
+            if self.policy == 'replay':
+                raise CacheMiss(f'No cached response for prompt {key[:12]} (CACHE_POLICY=replay)')
+            return None
+        return row[0]
+
+    def set(self, key: str, response: str) -> None:
+        if not self.writable:
+            return
+        try:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO responses (key, response, created_at) VALUES (?, ?, ?)',
+                (key, response, time.time()),
+            )
+            conn.commit()
+        except sqlite3.Error as exc:
+            logger.warning('Response cache write failed: %s', exc)
@@ -228,8 +228,8 @@ async function handleFormSubmit(e) {
         const data = await response.json();
 
         if (data.success) {
-            const itineraryPayload = data.itinerary_normalized || data.itinerary;
-            const budgetPayload = data.budget_normalized || data.budget;
+            const itineraryPayload = data.itinerary;
+            const budgetPayload = data.budget;
             const groupContext = data.group || { type: group, travelers };
             const transportOptions = data.transport || null;
             const hotelSpotlight = data.hotels || [];
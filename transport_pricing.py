@@ -2,11 +2,12 @@ import copy
 import logging
 import math
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
-import requests
+from cache_store import ExpiringCache
+from http_client import session as http_session, timeouts
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +15,8 @@ EARTH_RADIUS_KM = 6371.0
 DEFAULT_DEPARTURE_OFFSET_DAYS = 30
 DEFAULT_FLIGHT_CURRENCY = os.getenv("FLIGHT_CURRENCY", "USD")
 QUOTE_CACHE_TTL_SECONDS = int(os.getenv("TRANSPORT_QUOTE_CACHE_TTL", "21600"))  # default 6h
+STATION_CACHE_TTL_SECONDS = 7 * 24 * 3600
+STATION_MISS_TTL_SECONDS = 3600
 TRAVELPAYOUTS_TOKEN = os.getenv("TRAVELPAYOUTS_TOKEN")
 TRAVELPAYOUTS_SEARCH_URL = "https://api.travelpayouts.com/v2/prices/latest"
 
@@ -91,32 +94,27 @@ COUNTRY_ALIASES = {
     "UNITED STATES OF AMERICA": "US",
 }
 
-_quote_cache: Dict[str, Dict[str, Dict[str, Any]]] = {
-    "irctc": {},
-    "travelpayouts": {},
+# Fare quotes and station codes are stable for hours/days, so keep them in the
+# shared cache store (Redis when configured) and let every worker reuse them.
+_quote_cache: Dict[str, ExpiringCache] = {
+    "irctc": ExpiringCache("quotes:irctc", QUOTE_CACHE_TTL_SECONDS),
+    "travelpayouts": ExpiringCache("quotes:travelpayouts", QUOTE_CACHE_TTL_SECONDS),
 }
 
-_station_cache: Dict[str, Optional[str]] = {}
+_station_cache = ExpiringCache("stations", STATION_CACHE_TTL_SECONDS)
+_STATION_NOT_FOUND = ""  # cached marker for names with no station match
+_lookup_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="transport-lookup")
 
 
 def _cached_quotes(channel: str, key: str):
-    bucket = _quote_cache.get(channel, {})
-    entry = bucket.get(key)
-    if not entry:
+    data = _quote_cache[channel].get(key)
+    if data is None:
         return None
-    if time.time() - entry["ts"] > QUOTE_CACHE_TTL_SECONDS:
-        bucket.pop(key, None)
-        return None
-    return copy.deepcopy(entry["data"])
+    return copy.deepcopy(data)
 
 
 def _store_cached_quotes(channel: str, key: str, data):
-    if channel not in _quote_cache:
-        _quote_cache[channel] = {}
-    _quote_cache[channel][key] = {
-        "data": copy.deepcopy(data),
-        "ts": time.time(),
-    }
+    _quote_cache[channel].set(key, copy.deepcopy(data))
 
 
 def _haversine_distance(source: Dict[str, Any], destination: Dict[str, Any]) -> float:
@@ -249,11 +247,11 @@ def _irctc_train_quotes(source_code: Optional[str], dest_code: Optional[str], de
     }
 
     try:
-        response = requests.get(
+        response = http_session.get(
             IRCTC_BASE_URL,
             headers=headers,
             params=params,
-            timeout=12,
+            timeout=timeouts(12),
         )
         response.raise_for_status()
         payload = response.json() or {}
@@ -319,22 +317,21 @@ def _resolve_station_code(meta: Dict[str, Any]) -> Optional[str]:
     if not name:
         return None
 
-    cached = _station_cache.get(name)
-    if cached is not None:
-        return cached
-
     mapped = CITY_TO_STATION.get(name)
     if mapped:
-        _station_cache[name] = mapped
         return mapped
 
-    remote_code = _lookup_station_code_remote(name)
-    if remote_code:
-        _station_cache[name] = remote_code
-        return remote_code
+    cached = _station_cache.get(name)
+    if cached is not None:
+        return cached or None
 
-    _station_cache[name] = None
-    return None
+    remote_code = _lookup_station_code_remote(name)
+    _station_cache.set(
+        name,
+        remote_code or _STATION_NOT_FOUND,
+        ttl=None if remote_code else STATION_MISS_TTL_SECONDS,
+    )
+    return remote_code
 
 
 def _lookup_station_code_remote(query: str) -> Optional[str]:
@@ -351,11 +348,11 @@ def _lookup_station_code_remote(query: str) -> Optional[str]:
     params = {"query": query}
 
     try:
-        response = requests.get(
+        response = http_session.get(
             IRCTC_STATION_SEARCH_URL,
             headers=headers,
             params=params,
-            timeout=8,
+            timeout=timeouts(8),
         )
         response.raise_for_status()
         payload = response.json() or {}
@@ -469,11 +466,11 @@ def _travelpayouts_flight_quotes(source_code: Optional[str], dest_code: Optional
 
     def _perform_request(request_params):
         try:
-            response = requests.get(
+            response = http_session.get(
                 TRAVELPAYOUTS_SEARCH_URL,
                 params=request_params,
                 headers=headers,
-                timeout=12,
+                timeout=timeouts(12),
             )
             response.raise_for_status()
             payload = response.json() or {}
@@ -616,8 +613,10 @@ def build_transport_pricing(source_details: Optional[Dict[str, Any]],
             source_details.get("name"),
             destination_details.get("name"),
         )
-        source_station = _resolve_station_code(source_details)
+        # Both ends may need a remote station search; run them side by side.
+        source_station_future = _lookup_executor.submit(_resolve_station_code, source_details)
         dest_station = _resolve_station_code(destination_details)
+        source_station = source_station_future.result()
         logger.info("Resolved station codes: %s -> %s", source_station, dest_station)
         quotes = _irctc_train_quotes(source_station, dest_station, departure, travelers)
         if not quotes:
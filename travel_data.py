@@ -6,13 +6,17 @@ Free travel data integrations (no API keys needed)
 """
 
 import requests
-from functools import lru_cache
+from functools import lru_cache, wraps
 import logging
+import threading
+import time
 import urllib3
 import os
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from urllib.parse import quote
 
+from http_client import session as http_session, timeouts
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 logger = logging.getLogger(__name__)
@@ -27,6 +31,9 @@ EXCHANGERATE_URL = "https://api.exchangerate-api.com/v4/latest"
 GEOAPIFY_PLACES_URL = "https://api.geoapify.com/v2/places"
 GEOAPIFY_AUTOCOMPLETE_URL = "https://api.geoapify.com/v1/geocode/autocomplete"
 NOMINATIM_AUTOCOMPLETE_URL = "https://nominatim.openstreetmap.org/search"
+EXCHANGE_RATE_TTL_SECONDS = int(os.getenv('EXCHANGE_RATE_TTL', '3600'))
+REFERENCE_DATA_TTL_SECONDS = 86400  # country facts and advisories change rarely
+NEGATIVE_CACHE_TTL_SECONDS = int(os.getenv('NEGATIVE_CACHE_TTL', '300'))
 DEFAULT_POI_RADIUS = 2500
 DEFAULT_POI_LIMIT = 15
 DEFAULT_POI_KINDS = [
@@ -84,6 +91,45 @@ LOCAL_COUNTRY_OVERRIDES = {
 }
 
 
+def _ttl_cache(maxsize: int, ttl: int, none_ttl: Optional[int] = None):
+    """Memoize like ``lru_cache`` but expire entries after ``ttl`` seconds.
+
+    ``None`` results (not found / upstream failure) are kept for ``none_ttl``
+    seconds instead, so probes for unknown keys don't hit the upstream every
+    time but a transient failure isn't remembered for the full ``ttl``.
+    When the cache is full, expired entries go first, then the least
+    frequently used one.
+    """
+    miss_ttl = ttl if none_ttl is None else none_ttl
+
+    def decorator(func):
+        entries: Dict[Any, list] = {}  # key -> [value, expires_at, hits]
+        lock = threading.Lock()
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            with lock:
+                entry = entries.get(key)
+                if entry and entry[1] > now:
+                    entry[2] += 1
+                    return entry[0]
+
+            value = func(*args, **kwargs)
+
+            with lock:
+                if key not in entries and len(entries) >= maxsize:
+                    victim = min(entries, key=lambda k: (entries[k][1] > now, entries[k][2]))
+                    entries.pop(victim, None)
+                entries[key] = [value, now + (miss_ttl if value is None else ttl), 1]
+            return value
+
+        wrapper.cache_clear = entries.clear
+        return wrapper
+    return decorator
+
+
 @lru_cache(maxsize=100)
 def autocomplete_destination(query: str, limit: int = 10):
     """Autocomplete destinations via Geoapify, fallback to local list."""
@@ -151,10 +197,10 @@ def _geoapify_autocomplete(query: str, limit: int, api_key: str):
         'apiKey': api_key
     }
 
-    response = requests.get(
+    response = http_session.get(
         GEOAPIFY_AUTOCOMPLETE_URL,
         params=params,
-        timeout=8
+        timeout=timeouts(8)
     )
     response.raise_for_status()
     data = response.json()
@@ -204,11 +250,11 @@ def _nominatim_autocomplete(query: str, limit: int):
 
     headers = {'User-Agent': 'TravelPlanner/1.0 (demo@example.com)'}
 
-    response = requests.get(
+    response = http_session.get(
         NOMINATIM_AUTOCOMPLETE_URL,
         params=params,
         headers=headers,
-        timeout=8
+        timeout=timeouts(8)
     )
     response.raise_for_status()
     data = response.json()
@@ -248,7 +294,7 @@ def get_weather(lat: float, lon: float, days: int = 7):
     Returns daily forecast for temperature, precipitation, etc.
     """
     try:
-        response = requests.get(
+        response = http_session.get(
             f"{OPEN_METEO_URL}/forecast",
             params={
                 'latitude': lat,
@@ -257,7 +303,7 @@ def get_weather(lat: float, lon: float, days: int = 7):
                 'forecast_days': min(days, 16),  # Open-Meteo limit is 16 days
                 'timezone': 'auto'
             },
-            timeout=10
+            timeout=timeouts(10)
         )
         response.raise_for_status()
         data = response.json()
@@ -291,14 +337,14 @@ def get_timezone(lat: float, lon: float):
     Returns timezone info for coordinates.
     """
     try:
-        response = requests.get(
+        response = http_session.get(
             GEONAMES_TIMEZONE_URL,
             params={
                 'lat': lat,
                 'lng': lon,
                 'username': GEONAMES_USERNAME
             },
-            timeout=5
+            timeout=timeouts(5)
         )
         response.raise_for_status()
         data = response.json()
@@ -316,7 +362,7 @@ def get_timezone(lat: float, lon: float):
         return None
 
 
-@lru_cache(maxsize=100)
+@_ttl_cache(maxsize=256, ttl=REFERENCE_DATA_TTL_SECONDS, none_ttl=NEGATIVE_CACHE_TTL_SECONDS)
 def get_country_info(country_name: str):
     """Get country information using RestCountries with accurate matching."""
     if not country_name:
@@ -334,20 +380,20 @@ def get_country_info(country_name: str):
     }
 
     try:
-        response = requests.get(
+        response = http_session.get(
             f"{RESTCOUNTRIES_URL}/name/{quote(normalized_query)}",
             params=params,
-            timeout=10
+            timeout=timeouts(10)
         )
         response.raise_for_status()
         countries = response.json()
     except requests.HTTPError:
         # Retry with partial match if fullText fails
         try:
-            response = requests.get(
+            response = http_session.get(
                 f"{RESTCOUNTRIES_URL}/name/{quote(normalized_query)}",
                 params={'fullText': 'false'},
-                timeout=10
+                timeout=timeouts(10)
             )
             response.raise_for_status()
             countries = response.json()
@@ -406,16 +452,16 @@ def _get_local_country(country_key: str):
     return None
 
 
-@lru_cache(maxsize=100)
+@_ttl_cache(maxsize=256, ttl=REFERENCE_DATA_TTL_SECONDS, none_ttl=NEGATIVE_CACHE_TTL_SECONDS)
 def get_travel_advisory(country_code: str):
     """
     Get travel advisory using free travel-advisory.info API.
     Returns safety score and advisory message.
     """
     try:
-        response = requests.get(
+        response = http_session.get(
             TRAVEL_ADVISORY_URL,
-            timeout=10,
+            timeout=timeouts(10),
             verify=False  # Bypass SSL certificate error
         )
         response.raise_for_status()
@@ -449,7 +495,7 @@ def get_travel_advisory(country_code: str):
         return None
 
 
-@lru_cache(maxsize=50)
+@_ttl_cache(maxsize=256, ttl=EXCHANGE_RATE_TTL_SECONDS, none_ttl=NEGATIVE_CACHE_TTL_SECONDS)
 def get_exchange_rate(from_currency: str = 'USD', to_currency: str = 'EUR'):
     """
     Get currency exchange rates using exchangerate-api.com (completely free).
@@ -457,9 +503,9 @@ def get_exchange_rate(from_currency: str = 'USD', to_currency: str = 'EUR'):
     """
     try:
         # API: https://api.exchangerate-api.com/v4/latest/USD
-        response = requests.get(
+        response = http_session.get(
             f"{EXCHANGERATE_URL}/{from_currency}",
-            timeout=10
+            timeout=timeouts(10)
         )
         response.raise_for_status()
         data = response.json()
@@ -480,7 +526,7 @@ def get_exchange_rate(from_currency: str = 'USD', to_currency: str = 'EUR'):
 
 
 def get_pois(lat: float, lon: float, kinds=None, radius: Optional[int] = None,
-             limit: Optional[int] = None, api_key: Optional[str] = None):
+             limit: Optional[int] = None, api_key: Optional[str] = None, timeout: float = 12):
     """Fetch nearby points of interest using Geoapify Places, ranked by popularity."""
     api_key = api_key or os.getenv('GEOAPIFY_API_KEY')
     if not api_key:
@@ -505,10 +551,10 @@ def get_pois(lat: float, lon: float, kinds=None, radius: Optional[int] = None,
     }
 
     try:
-        response = requests.get(
+        response = http_session.get(
             GEOAPIFY_PLACES_URL,
             params=params,
-            timeout=12
+            timeout=timeouts(timeout)
         )
         response.raise_for_status()
         data = response.json()
@@ -549,7 +595,7 @@ def get_pois(lat: float, lon: float, kinds=None, radius: Optional[int] = None,
 
 
 def get_hotels(lat: float, lon: float, radius: Optional[int] = None,
-               limit: Optional[int] = None, api_key: Optional[str] = None):
+               limit: Optional[int] = None, api_key: Optional[str] = None, timeout: float = 12):
     radius_value = radius or 2000
     limit_value = limit or 6
     return get_pois(
@@ -559,6 +605,7 @@ def get_hotels(lat: float, lon: float, radius: Optional[int] = None,
         radius=radius_value,
         limit=limit_value,
         api_key=api_key,
+        timeout=timeout,
     )
 
 
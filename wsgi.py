@@ -0,0 +1,22 @@
+"""
+Production WSGI entrypoint (gunicorn -k gevent wsgi:app)
+- Monkey-patches the stdlib before anything else is imported so requests,
+  urllib3, redis and the logging/executor threads yield cooperatively while
+  waiting on upstream I/O
+- Enables gRPC's gevent integration for the Gemini client
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+try:
+    from grpc.experimental import gevent as grpc_gevent
+except ImportError:  # grpc is only pulled in by google-generativeai
+    grpc_gevent = None
+if grpc_gevent is not None:
+    grpc_gevent.init_gevent()
+
+from api import app  # noqa: E402
+
+__all__ = ['app']